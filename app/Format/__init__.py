@@ -0,0 +1 @@
+"""SunPixel 各输出格式的转换器"""
@@ -0,0 +1,631 @@
+import numpy as np
+from PIL import Image
+import os
+import json
+import re
+from pathlib import Path
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+try:
+    from numba import njit, prange, set_num_threads, threading_layer
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 查找表中尚未计算的格子
+LUT_EMPTY = 0xFFFF
+# find_closest_color 结果缓存的最大条目数，超出后整体清空
+CLOSEST_CACHE_SIZE = 4096
+# 最多缓存的方块组合数，超出后整体清空
+PALETTE_CACHE_SIZE = 32
+# 无 Numba 时每次处理的输出行数
+TILE_ROWS = 64
+# 方块映射文件中以 # 开头的注释行
+COMMENT_LINE_RE = re.compile(r'^[ \t]*#.*$', re.M)
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, nogil=True, cache=True)
+    def _quantize_image_kernel(pixels, row_starts, col_starts, src_height, src_width, out_keys):
+        """一次遍历原图：逐块求平均颜色并直接输出 5-5-5 量化键"""
+        out_height = row_starts.shape[0]
+        out_width = col_starts.shape[0]
+        for y in prange(out_height):
+            y0 = row_starts[y]
+            y1 = row_starts[y + 1] if y + 1 < out_height else src_height
+            if y1 <= y0:
+                y1 = y0 + 1
+            for x in range(out_width):
+                x0 = col_starts[x]
+                x1 = col_starts[x + 1] if x + 1 < out_width else src_width
+                if x1 <= x0:
+                    x1 = x0 + 1
+                sr = 0
+                sg = 0
+                sb = 0
+                for yy in range(y0, y1):
+                    for xx in range(x0, x1):
+                        sr += pixels[yy, xx, 0]
+                        sg += pixels[yy, xx, 1]
+                        sb += pixels[yy, xx, 2]
+                area = (y1 - y0) * (x1 - x0)
+                out_keys[y, x] = (((sr // area) >> 3) << 10) | (((sg // area) >> 3) << 5) | ((sb // area) >> 3)
+
+    @njit(parallel=True, nogil=True, cache=True)
+    def _fill_lut_kernel(keys, palette, lut_flat):
+        """逐个量化键扫描调色板，按 redmean 整数距离写入最接近的调色板行号"""
+        for i in prange(keys.shape[0]):
+            key = keys[i]
+            # 与向量化路径相同，取量化格的中心颜色
+            r = (key >> 10) * 8 + 4
+            g = ((key >> 5) & 31) * 8 + 4
+            b = (key & 31) * 8 + 4
+            best_row = 0
+            best_distance = 1 << 62
+            for k in range(palette.shape[0]):
+                r_sum = r + palette[k, 0]
+                r_diff = r - palette[k, 0]
+                g_diff = g - palette[k, 1]
+                b_diff = b - palette[k, 2]
+                distance = ((1024 + r_sum) * r_diff * r_diff +
+                            2048 * g_diff * g_diff +
+                            (1534 - r_sum) * b_diff * b_diff)
+                if distance < best_distance:
+                    best_distance = distance
+                    best_row = k
+            lut_flat[key] = best_row
+
+def encode_varints(values):
+    """按 schem 规范将方块索引编码为 varint 字节 (每字节低 7 位存数据，最高位表示后面还有字节)"""
+    values = np.ascontiguousarray(values, dtype=np.uint32).ravel()
+    # 调色板不超过 128 种时每个索引正好一个字节，直接转换
+    if values.size == 0 or int(values.max()) < 0x80:
+        return values.astype(np.int8)
+    
+    # 每个索引所需的字节数及其在输出中的起始位置
+    lengths = np.ones(values.size, dtype=np.intp)
+    for threshold in (0x80, 0x4000, 0x200000, 0x10000000):
+        lengths += values >= threshold
+    starts = np.cumsum(lengths) - lengths
+    
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        chunk = ((values[mask] >> (7 * k)) & 0x7F).astype(np.uint8)
+        chunk[lengths[mask] > k + 1] |= 0x80
+        out[starts[mask] + k] = chunk
+    return out.view(np.int8)
+
+def pack_block_states(indices, bits_per_entry):
+    """将方块索引按 bits_per_entry 位紧密打包为 Litematica 的 64 位 BlockStates，条目可跨越相邻的 Long"""
+    indices = np.ascontiguousarray(indices, dtype=np.uint64).ravel()
+    # 逐条目展开为低位在前的比特流，补齐到 64 的整数倍后按小端字节序重新解释为 Long
+    bits = ((indices[:, None] >> np.arange(bits_per_entry, dtype=np.uint64)) & 1).astype(np.uint8).ravel()
+    bits = np.pad(bits, (0, -bits.size % 64))
+    return np.packbits(bits, bitorder='little').view('<i8')
+
+class Color:
+    """终端颜色枚举"""
+    RESET = '\033[0m'
+    RED = '\033[91m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    MAGENTA = '\033[95m'
+    CYAN = '\033[96m'
+    WHITE = '\033[97m'
+    BOLD = '\033[1m'
+    GRAY = '\033[90m'
+
+class ProgressDisplay(threading.Thread):
+    """实时进度显示线程"""
+    def __init__(self, total, description, config):
+        super().__init__()
+        self.total = total
+        self.description = description
+        self.config = config
+        self.current = 0
+        self.running = True
+        self.daemon = True
+        # stop() 时立即唤醒刷新循环，join 不必等满一个刷新间隔
+        self._wake = threading.Event()
+        # 预先生成 0~30 格的全部进度条，刷新时按已完成格数直接取用
+        bar_length = 30
+        self._bars_plain = ['█' * i + '░' * (bar_length - i) for i in range(bar_length + 1)]
+        self._bars_color = [f'{Color.GREEN}█{Color.RESET}' * i + f'{Color.GRAY}░{Color.RESET}' * (bar_length - i) for i in range(bar_length + 1)]
+        
+    def update(self, value):
+        """更新进度"""
+        self.current = value
+        
+    def stop(self):
+        """停止进度显示"""
+        self.running = False
+        self._wake.set()
+        
+    def run(self):
+        """运行进度显示"""
+        use_color = self.config.getboolean('ui', 'colored_output', True)
+        bars = self._bars_color if use_color else self._bars_plain
+        bar_length = len(bars) - 1
+        
+        last_current = None
+        while self.running and self.current < self.total:
+            current = self.current
+            # 进度没有变化时不重绘，省去重复的输出和 flush
+            if current != last_current:
+                last_current = current
+                progress = (current / self.total) * 100
+                filled_length = int(bar_length * current // self.total)
+                bar = bars[filled_length]
+                
+                sys.stdout.write(f'\r📊 {self.description}: [{bar}] {current}/{self.total} ({progress:.1f}%)')
+                sys.stdout.flush()
+            self._wake.wait(0.1)
+        
+        if self.current >= self.total:
+            progress = 100.0
+            bar = bars[bar_length]
+            sys.stdout.write(f'\r📊 {self.description}: [{bar}] {self.current}/{self.total} ({progress:.1f}%) ✅\n')
+            sys.stdout.flush()
+
+class BaseConverter:
+    """各格式转换器的公共部分：加载方块映射、颜色匹配和生成方块数据，子类只需实现 save"""
+    # 进程内按方块映射内容缓存调色板数组和查找表，多次转换时只构建一次，各格式共用
+    _palette_cache = {}
+    # 已解析的方块映射文件，按路径和修改时间缓存
+    _block_file_cache = {}
+    
+    def __init__(self, config):
+        self.config = config
+        # 颜色匹配算法: redmean (默认) 或 lab (CIE76)
+        self.color_metric = str(config.get('conversion', 'color_metric', 'redmean')).lower()
+        self.color_to_block = {}
+        self.block_palette = []
+        self.block_data = []
+        self.width = 0
+        self.height = 0
+        self.depth = 1
+        self.pixels = None
+        self.original_width = 0
+        self.original_height = 0
+        
+    def read_block_file(self, block_file):
+        """读取单个方块映射文件，按文件修改时间缓存解析结果；没有有效内容时返回 None"""
+        cache_key = str(block_file.resolve())
+        mtime = block_file.stat().st_mtime_ns
+        cached = type(self)._block_file_cache.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with open(block_file, 'r', encoding='utf-8') as f:
+            content = COMMENT_LINE_RE.sub('', f.read())
+        
+        block_pairs = None
+        if content.strip():
+            # 按顺序保留全部条目，不同文件中颜色相同的方块不会被覆盖
+            block_pairs = json.loads(content, object_pairs_hook=list)
+        
+        type(self)._block_file_cache[cache_key] = (mtime, block_pairs)
+        return block_pairs
+        
+    def load_block_mappings(self, selected_blocks):
+        """从block目录加载选中的方块映射"""
+        self.color_to_block = {}
+        self._color_entries = []
+        block_dir = Path("block")
+        
+        if not block_dir.exists():
+            print(f"{Color.RED}❌ 错误: block目录不存在!{Color.RESET}")
+            return False
+            
+        for block_file in sorted(block_dir.glob("*.json")):
+            block_name = block_file.stem
+            if block_name in selected_blocks:
+                try:
+                    block_pairs = self.read_block_file(block_file)
+                    if block_pairs is not None:
+                        # 规范化方块数据，确保aux是整数
+                        for color_key, block_info in block_pairs:
+                            if isinstance(block_info, list) and len(block_info) >= 2:
+                                try:
+                                    aux_int = int(block_info[1])
+                                except (ValueError, TypeError):
+                                    aux_int = 0
+                                block_info = [block_info[0], aux_int]
+                            else:
+                                block_info = ["minecraft:white_concrete", 0]
+                            
+                            self._color_entries.append((color_key, block_info))
+                            self.color_to_block[color_key] = block_info
+                        print(f"{Color.GREEN}✅ 已加载: {block_name}{Color.RESET}")
+                    else:
+                        print(f"{Color.YELLOW}❌ 文件 {block_file} 中没有有效的JSON内容{Color.RESET}")
+                except Exception as e:
+                    print(f"{Color.RED}❌ 加载 {block_file} 时出错: {e}{Color.RESET}")
+        
+        if not self.color_to_block:
+            print(f"{Color.RED}❌ 错误: 没有加载任何方块映射!{Color.RESET}")
+            return False
+        
+        self.build_palette_arrays()
+            
+        skipped = len(self._color_entries) - len(self._palette_names)
+        if skipped > 0:
+            print(f"{Color.YELLOW}⚠️  {skipped} 条映射的颜色与前面的重复或无法解析，不会被匹配到，已忽略{Color.RESET}")
+        print(f"{Color.GREEN}✅ 总共加载 {len(self._palette_names)} 种颜色映射{Color.RESET}")
+        return True
+        
+    def _color_distance_sq(self, c1, c2):
+        """计算两个颜色之间的感知距离 (整数运算，返回平方距离)"""
+        r1, g1, b1 = (int(v) for v in c1)
+        r2, g2, b2 = (int(v) for v in c2)
+        # redmean 权重整体乘以 512 后全部为整数，省略开方不影响大小比较
+        r_sum = r1 + r2
+        
+        r_diff = r1 - r2
+        g_diff = g1 - g2
+        b_diff = b1 - b2
+        
+        return (
+            (1024 + r_sum) * r_diff * r_diff +
+            2048 * g_diff * g_diff +
+            (1534 - r_sum) * b_diff * b_diff
+        )
+        
+    def find_closest_color(self, color):
+        """找到最接近的颜色映射，按打包后的 RGB 缓存结果，相同颜色只计算一次"""
+        r, g, b = (int(v) for v in color[:3])
+        key = (r << 16) | (g << 8) | b
+        result = self._closest_cache.get(key)
+        if result is None:
+            row = self.nearest_palette_rows(np.array([[r, g, b]], dtype=np.int16))[0]
+            result = self._palette_names[row], int(self._palette_values[row])
+            if len(self._closest_cache) >= CLOSEST_CACHE_SIZE:
+                self._closest_cache.clear()
+            self._closest_cache[key] = result
+        return result
+    
+    def build_palette_arrays(self):
+        """一次性解析所有颜色键，生成向量化匹配用的调色板数组"""
+        self._closest_cache = {}
+        # 方块信息转为 repr 字符串后整个键可哈希，比逐条 json 序列化更省
+        cache_key = (self.color_metric, tuple((color_key, repr(block_info)) for color_key, block_info in self._color_entries))
+        cached = type(self)._palette_cache.get(cache_key)
+        if cached is not None:
+            (self._palette_names, self._palette_rgb, self._palette_values,
+             self._palette_lab, self._lut, self.block_palette, self._palette_block_idx) = cached
+            return
+        
+        colors = []
+        self._palette_names = []
+        values = []
+        
+        for color_key, block_info in self._color_entries:
+            try:
+                color_values = [int(x.strip()) for x in color_key.strip('()').split(',')]
+            except ValueError:
+                continue
+            if len(color_values) < 3:
+                continue
+            
+            if isinstance(block_info, list) and len(block_info) >= 2:
+                block_name, block_data = block_info[0], block_info[1]
+            else:
+                block_name, block_data = "minecraft:white_concrete", 0
+            
+            colors.append(color_values[:3])
+            self._palette_names.append(block_name)
+            values.append(block_data)
+        
+        if not colors:
+            colors.append([255, 255, 255])
+            self._palette_names.append("minecraft:white_concrete")
+            values.append(0)
+        
+        self._palette_rgb = np.array(colors, dtype=np.int16)
+        # 与 block_data_values 同为 int16，生成时按同一组调色板行号直接取值，无需再转换类型
+        self._palette_values = np.array(values, dtype=np.int16)
+        self._palette_lab = None
+        if self.color_metric == 'lab':
+            self._palette_lab = self.rgb_to_lab_int8(self._palette_rgb)
+        
+        # 颜色相同 (lab 模式下为量化后的 Lab 相同) 的条目中只有第一条可能被匹配到，其余的不进入调色板
+        features = self._palette_rgb if self._palette_lab is None else self._palette_lab
+        _, first_rows = np.unique(features, axis=0, return_index=True)
+        if first_rows.size < len(self._palette_names):
+            keep = np.sort(first_rows)
+            self._palette_names = [self._palette_names[i] for i in keep]
+            self._palette_rgb = self._palette_rgb[keep]
+            self._palette_values = self._palette_values[keep]
+            if self._palette_lab is not None:
+                self._palette_lab = self._palette_lab[keep]
+        self.build_color_lut()
+        
+        # 按首次出现顺序去重得到方块调色板，保证每次生成的调色板顺序一致
+        self.block_palette = list(dict.fromkeys(self._palette_names))
+        block_index = {name: idx for idx, name in enumerate(self.block_palette)}
+        self._palette_block_idx = np.array([block_index[name] for name in self._palette_names], dtype=np.uint16)
+        
+        if len(type(self)._palette_cache) >= PALETTE_CACHE_SIZE:
+            type(self)._palette_cache.clear()
+        type(self)._palette_cache[cache_key] = (
+            self._palette_names, self._palette_rgb, self._palette_values,
+            self._palette_lab, self._lut, self.block_palette, self._palette_block_idx
+        )
+        
+    def build_color_lut(self):
+        """创建 5-5-5 量化 RGB 到调色板行号的查找表 (32×32×32)，按需填充"""
+        self._lut = np.full((32, 32, 32), LUT_EMPTY, dtype=np.uint16)
+        
+    def fill_color_lut(self, keys):
+        """只为图片中实际出现且尚未计算的量化键求最近调色板行号"""
+        lut_flat = self._lut.reshape(-1)
+        present = np.zeros(lut_flat.size, dtype=bool)
+        present[keys.ravel()] = True
+        missing = np.flatnonzero(present & (lut_flat == LUT_EMPTY))
+        
+        if NUMBA_AVAILABLE and self.color_metric != 'lab':
+            _fill_lut_kernel(missing, self._palette_rgb, lut_flat)
+            return
+        
+        # 每个量化格取中心颜色参与匹配，分批计算以限制临时数组大小
+        for start in range(0, missing.size, 1024):
+            batch = missing[start:start + 1024]
+            colors = np.stack([batch >> 10, (batch >> 5) & 31, batch & 31], axis=1) * 8 + 4
+            lut_flat[batch] = self.nearest_palette_rows(colors)
+        
+    def nearest_palette_rows(self, colors):
+        """对 (N, 3) 颜色数组整体求最接近的调色板行号"""
+        if self.color_metric == 'lab':
+            # int8 Lab 上的绝对差之和 (SAD)，最大 3*255 不会溢出 int16
+            lab = self.rgb_to_lab_int8(colors).astype(np.int16)
+            palette_lab = self._palette_lab.astype(np.int16)
+            distance = np.zeros((lab.shape[0], palette_lab.shape[0]), dtype=np.int16)
+            for c in range(3):
+                distance += np.abs(lab[:, None, c] - palette_lab[None, :, c])
+            return np.argmin(distance, axis=1)
+        
+        # 按通道转置为连续的 (3, N) / (3, K) 数组，广播时每个通道都是顺序访问
+        r, g, b = np.ascontiguousarray(colors.T, dtype=np.int32)[:, :, None]
+        pr, pg, pb = np.ascontiguousarray(self._palette_rgb.T, dtype=np.int32)[:, None, :]
+        
+        # 逐通道计算 (N, K) 的差值，不生成 (N, K, 3) 的临时数组
+        r_sum = r + pr
+        r_diff = r - pr
+        g_diff = g - pg
+        b_diff = b - pb
+        
+        # 与 _color_distance_sq 相同的整数权重，最大值约 3 亿，int32 不会溢出
+        distance = (1024 + r_sum) * (r_diff * r_diff)
+        distance += 2048 * (g_diff * g_diff)
+        distance += (1534 - r_sum) * (b_diff * b_diff)
+        return np.argmin(distance, axis=1)
+    
+    def rgb_to_lab(self, colors):
+        """将 (N, 3) sRGB 颜色转换为 CIELAB (D65 白点, float32)"""
+        rgb = colors.astype(np.float32) / 255
+        rgb = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+        
+        matrix = np.array([
+            [0.4124564, 0.3575761, 0.1804375],
+            [0.2126729, 0.7151522, 0.0721750],
+            [0.0193339, 0.1191920, 0.9503041]
+        ], dtype=np.float32)
+        xyz = rgb @ matrix.T / np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+        
+        f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+        return np.stack([
+            116 * f[:, 1] - 16,
+            500 * (f[:, 0] - f[:, 1]),
+            200 * (f[:, 1] - f[:, 2])
+        ], axis=1).astype(np.float32)
+    
+    def rgb_to_lab_int8(self, colors):
+        """将 (N, 3) sRGB 颜色转换为量化到 int8 的 CIELAB"""
+        lab = self.rgb_to_lab(colors)
+        return np.clip(np.rint(lab), -128, 127).astype(np.int8)
+    
+    def load_image(self, image_path):
+        """加载图片，支持PNG和JPG格式，也可直接传入已解码的 (高, 宽, 3/4) 数组"""
+        print(f"{Color.CYAN}🖼️  正在加载图片...{Color.RESET}")
+        
+        if isinstance(image_path, np.ndarray):
+            # 调用方已解码过图片时直接使用，避免再次读取文件
+            self.pixels = np.ascontiguousarray(image_path[:, :, :3], dtype=np.uint8)
+        else:
+            ext = os.path.splitext(image_path)[1].lower()
+            
+            if ext not in ('.png', '.jpg', '.jpeg'):
+                raise ValueError(f"不支持的图片格式: {ext}")
+            
+            # PNG 和 JPG 统一交给 Pillow 在 C 层解码，透明通道直接丢弃
+            try:
+                with Image.open(image_path) as img:
+                    # 已是 RGB 时直接取数组，省去 convert 产生的整图拷贝
+                    if img.mode != 'RGB':
+                        img = img.convert('RGB')
+                    self.pixels = np.asarray(img)
+            except OSError as e:
+                raise ValueError(f"无法读取图片 '{image_path}': {e}") from e
+        self.original_height, self.original_width = self.pixels.shape[:2]
+        
+        print(f"{Color.GREEN}✅ 图片加载完成: {self.original_width} × {self.original_height} 像素{Color.RESET}")
+            
+    def calculate_best_ratio(self, target_width, target_height):
+        """计算最佳保持比例的尺寸"""
+        orig_ratio = self.original_width / self.original_height
+        target_ratio = target_width / target_height
+        
+        if abs(orig_ratio - target_ratio) < 0.05:
+            return target_width, target_height
+        
+        if orig_ratio > target_ratio:
+            best_width = target_width
+            best_height = int(target_width / orig_ratio)
+        else:
+            best_height = target_height
+            best_width = int(target_height * orig_ratio)
+            
+        return best_width, best_height
+    
+    def set_size(self, width, height):
+        """设置生成结构的尺寸"""
+        self.width = max(1, width)
+        self.height = max(1, height)
+        print(f"{Color.CYAN}📐 设置生成尺寸: {self.width} × {self.height} 方块{Color.RESET}")
+            
+    def downsample_pixels(self, row_start=0, row_stop=None):
+        """按目标尺寸对原图做区域平均，得到输出行 [row_start, row_stop) 的 (行数, 宽, 3) 平均颜色"""
+        if row_stop is None:
+            row_stop = self.height
+        
+        # 每个方块对应的源区域起点，与逐像素切片时的 int(y * scale_y) 一致
+        row_starts = (np.arange(self.height) * (self.original_height / self.height)).astype(np.intp)
+        col_starts = (np.arange(self.width) * (self.original_width / self.width)).astype(np.intp)
+        
+        # 放大时区域可能为空，此时取起点处的单个像素
+        row_counts = np.maximum(np.diff(np.append(row_starts, self.original_height)), 1)[row_start:row_stop]
+        col_counts = np.maximum(np.diff(np.append(col_starts, self.original_width)), 1)
+        
+        # 只截取这些输出行覆盖的源图行，再做分段求和
+        band = row_starts[row_start:row_stop]
+        src_stop = row_starts[row_stop] if row_stop < self.height else self.original_height
+        src_stop = max(src_stop, band[-1] + 1)
+        sums = np.add.reduceat(self.pixels[band[0]:src_stop], band - band[0], axis=0, dtype=np.uint32)
+        sums = np.add.reduceat(sums, col_starts, axis=1, dtype=np.uint32)
+        
+        areas = (row_counts[:, None] * col_counts[None, :]).astype(np.uint32)
+        return (sums // areas[:, :, None]).astype(np.uint8)
+            
+    def map_pixels_to_rows(self):
+        """将原图映射为 (高, 宽) 的调色板行号，优先使用 Numba 融合内核"""
+        if NUMBA_AVAILABLE:
+            row_starts = (np.arange(self.height) * (self.original_height / self.height)).astype(np.intp)
+            col_starts = (np.arange(self.width) * (self.original_width / self.width)).astype(np.intp)
+            keys = np.empty((self.height, self.width), dtype=np.uint16)
+            _quantize_image_kernel(np.ascontiguousarray(self.pixels), row_starts, col_starts,
+                                   self.original_height, self.original_width, keys)
+        else:
+            # 按输出行分块处理，限制分段求和的中间数组大小；NumPy 运算会释放 GIL，各块交给线程池并行
+            keys = np.empty((self.height, self.width), dtype=np.uint16)
+            
+            def quantize_band(row_start):
+                row_stop = min(row_start + TILE_ROWS, self.height)
+                q = (self.downsample_pixels(row_start, row_stop) >> 3).astype(np.uint16)
+                keys[row_start:row_stop] = (q[:, :, 0] << 10) | (q[:, :, 1] << 5) | q[:, :, 2]
+            
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                list(executor.map(quantize_band, range(0, self.height, TILE_ROWS)))
+        
+        self.fill_color_lut(keys)
+        return self._lut.reshape(-1)[keys]
+
+    def generate_block_data(self):
+        """生成方块数据"""
+        print(f"{Color.CYAN}🔨 正在生成方块数据...{Color.RESET}")
+        
+        print(f"{Color.CYAN}🎨 初始化调色板: {len(self.block_palette)} 种方块{Color.RESET}")
+        
+        # 调色板索引用 uint16 即可容纳全部方块种类
+        self.block_data = np.zeros((self.depth, self.height, self.width), dtype=np.uint16)
+        
+        print(f"{Color.CYAN}🔄 正在处理像素数据...{Color.RESET}")
+        total_pixels = self.width * self.height
+        
+        # 进度条可在配置中关闭 (ui.show_progress)，关闭时不启动刷新线程
+        progress_thread = None
+        if self.config.getboolean('ui', 'show_progress', True):
+            progress_thread = ProgressDisplay(total_pixels, "处理像素", self.config)
+            progress_thread.start()
+        
+        rows = self.map_pixels_to_rows()
+        self.fill_block_data(rows)
+        
+        if progress_thread is not None:
+            progress_thread.update(total_pixels)
+            progress_thread.stop()
+            progress_thread.join()
+        
+        print(f"{Color.GREEN}✅ 方块数据生成完成{Color.RESET}")
+    
+    def fill_block_data(self, rows):
+        """按调色板行号写入方块索引，需要额外数据的格式在子类中扩展"""
+        # 行号来自查找表，必定在调色板范围内；clip 模式下 np.take 直接写入 out，不产生临时数组
+        np.take(self._palette_block_idx, rows, out=self.block_data[0], mode='clip')
+
+    def convert(self, input_image, output_path, width=None, height=None, selected_blocks=None):
+        """转换入口函数"""
+        if selected_blocks is None:
+            selected_blocks = []
+            
+        print(f"{Color.CYAN}🚀 开始转换流程...{Color.RESET}")
+        
+        if not self.load_block_mappings(selected_blocks):
+            return None
+            
+        try:
+            self.load_image(input_image)
+            
+            if width is None or height is None:
+                self.set_size(self.original_width, self.original_height)
+            else:
+                self.set_size(width, height)
+                
+            self.generate_block_data()
+            return self.save(output_path)
+        except Exception as e:
+            print(f"{Color.RED}❌ 转换过程中发生错误: {e}{Color.RESET}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def save(self, output_path):
+        """保存为具体格式的文件，返回 (宽, 高, 方块数)"""
+        raise NotImplementedError
+
+def _batch_worker_init():
+    """批量转换子进程初始化：进程池已占满 CPU，每个进程只保留一个 Numba 线程"""
+    if NUMBA_AVAILABLE:
+        set_num_threads(1)
+
+def _batch_worker(converter_class, config, selected_blocks, job):
+    """批量转换的子进程入口，需为模块级函数以便序列化"""
+    input_image, output_path, width, height = job
+    converter = converter_class(config)
+    return converter.convert(input_image, output_path, width, height, selected_blocks)
+
+def _numba_threads_started():
+    """当前进程是否已启动 Numba 线程池 (启动后再 fork 不安全)"""
+    if not NUMBA_AVAILABLE:
+        return False
+    try:
+        threading_layer()
+        return True
+    except ValueError:
+        return False
+
+def convert_batch(converter_class, jobs, config, selected_blocks, workers=None):
+    """用 converter_class 多进程批量转换，jobs 为 (输入图片, 输出路径, 宽, 高) 列表，按顺序返回每个结果"""
+    jobs = list(jobs)
+    
+    # 先在主进程加载方块映射，fork 出的子进程直接继承已缓存的调色板
+    if not converter_class(config).load_block_mappings(selected_blocks):
+        return [None] * len(jobs)
+    
+    if len(jobs) <= 1:
+        return [_batch_worker(converter_class, config, selected_blocks, job) for job in jobs]
+    
+    # 转换器模块以 Format.<格式> 的固定名称导入，spawn 启动的子进程也能按名称找到；
+    # 已启动 Numba 线程池后再 fork 不安全，此时同样改用 spawn
+    if 'fork' in multiprocessing.get_all_start_methods() and not _numba_threads_started():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context,
+                             initializer=_batch_worker_init) as executor:
+        return list(executor.map(partial(_batch_worker, converter_class, config, selected_blocks), jobs))
+
@@ -1,73 +1,15 @@
 import numpy as np
-import png
-from PIL import Image
 import os
-import time
-import math
 import json
-from pathlib import Path
 import sys
-import threading
 
-class Color:
-    """终端颜色枚举"""
-    RESET = '\033[0m'
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    BOLD = '\033[1m'
-    GRAY = '\033[90m'
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class ProgressDisplay(threading.Thread):
-    """实时进度显示线程"""
-    def __init__(self, total, description, config):
-        super().__init__()
-        self.total = total
-        self.description = description
-        self.config = config
-        self.current = 0
-        self.running = True
-        self.daemon = True
-        
-    def update(self, value):
-        """更新进度"""
-        self.current = value
-        
-    def stop(self):
-        """停止进度显示"""
-        self.running = False
-        
-    def run(self):
-        """运行进度显示"""
-        use_color = self.config.getboolean('ui', 'colored_output', True)
-        
-        while self.running and self.current < self.total:
-            progress = (self.current / self.total) * 100
-            bar_length = 30
-            filled_length = int(bar_length * self.current // self.total)
-            
-            if use_color:
-                bar = f'{Color.GREEN}█{Color.RESET}' * filled_length + f'{Color.GRAY}░{Color.RESET}' * (bar_length - filled_length)
-            else:
-                bar = '█' * filled_length + '░' * (bar_length - filled_length)
-            
-            sys.stdout.write(f'\r📊 {self.description}: [{bar}] {self.current}/{self.total} ({progress:.1f}%)')
-            sys.stdout.flush()
-            time.sleep(0.1)
-        
-        if self.current >= self.total:
-            progress = 100.0
-            bar_length = 30
-            if use_color:
-                bar = f'{Color.GREEN}█{Color.RESET}' * bar_length
-            else:
-                bar = '█' * bar_length
-            sys.stdout.write(f'\r📊 {self.description}: [{bar}] {self.current}/{self.total} ({progress:.1f}%) ✅\n')
-            sys.stdout.flush()
+from ._common import BaseConverter, Color
+from . import _common
 
 class TypeCheckList(list):
     """类型检查列表"""
@@ -80,350 +22,234 @@ class TypeCheckList(list):
         return self
     
     def append(self, obj):
-        if self.checker and not isinstance(obj, self.checker):
-            raise Exception(f"类型错误: 期望 {self.checker}, 得到 {type(obj)}")
+        checker = self.checker
+        # 先比较精确类型，只有子类才走 isinstance
+        if checker and type(obj) is not checker and not isinstance(obj, checker):
+            raise Exception(f"类型错误: 期望 {checker}, 得到 {type(obj)}")
         super().append(obj)
     
     def extend(self, iterable):
-        for obj in iterable:
-            self.append(obj)
+        # 整批检查通过后一次性追加，出错时列表保持不变
+        objs = list(iterable)
+        checker = self.checker
+        if checker:
+            for obj in objs:
+                if type(obj) is not checker and not isinstance(obj, checker):
+                    raise Exception(f"类型错误: 期望 {checker}, 得到 {type(obj)}")
+        super().extend(objs)
+
+class RunAwayBlocks:
+    """RunAway.blocks 的兼容视图：追加时检查类型，读取时才临时生成字典"""
+    def __init__(self, owner):
+        self._owner = owner
+
+    def append(self, obj):
+        self._owner._pending.append(obj)
+
+    def extend(self, iterable):
+        self._owner._pending.extend(iterable)
+
+    def __len__(self):
+        return len(self._owner.name_idx) + len(self._owner._pending)
+
+    def __iter__(self):
+        return self._owner.iter_blocks()
+
+    def __getitem__(self, index):
+        owner = self._owner
+        owner.flush()
+        if isinstance(index, slice):
+            return [owner.block_at(i) for i in range(len(owner.name_idx))[index]]
+        return owner.block_at(index)
 
 class RunAway:
-    """RunAway 官方结构文件对象"""
+    """RunAway 官方结构文件对象
+
+    方块按列存储：name 为 palette 下标 (int16)，aux/x/y/z 为 int32 数组。
+    blocks 属性保留原来的字典列表接口，可整体赋值替换全部方块；修改取出的字典不会写回。
+    """
     def __init__(self):
-        self.blocks: list = TypeCheckList().setChecker(dict)
+        self.palette: list = []
+        self._palette_index: dict = {}
+        self.name_idx = np.empty(0, dtype=np.int16)
+        self.aux = np.empty(0, dtype=np.int32)
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.z = np.empty(0, dtype=np.int32)
+        # 通过 blocks.append/extend 加入、尚未写入列数组的字典
+        self._pending: list = TypeCheckList().setChecker(dict)
 
     def __setattr__(self, name, value):
-        if not hasattr(self, name):
+        if name == "blocks":
+            # blocks 是属性，整体赋值交给下面的 setter 检查和转换
             super().__setattr__(name, value)
-        elif isinstance(value, type(getattr(self, name))):
+        elif not hasattr(self, name):
             super().__setattr__(name, value)
         else:
-            raise Exception(f"无法修改 {name} 属性")
+            current_type = type(getattr(self, name))
+            if type(value) is not current_type and not isinstance(value, current_type):
+                raise Exception(f"无法修改 {name} 属性")
+            super().__setattr__(name, value)
 
     def __delattr__(self, name):
         raise Exception("无法删除任何属性")
 
-    def error_check(self):
-        for block in self.blocks:
-            if not isinstance(block.get("name", None), str):
+    @property
+    def blocks(self):
+        return RunAwayBlocks(self)
+
+    @blocks.setter
+    def blocks(self, value):
+        """整体替换方块列表，兼容原来直接给 blocks 赋值 (TypeCheckList 等列表) 的用法"""
+        if not isinstance(value, (list, RunAwayBlocks)):
+            raise Exception("无法修改 blocks 属性")
+        # 先取出全部方块再清空，value 也可以是本结构自己的 blocks 视图
+        blocks = list(value)
+        pending = TypeCheckList().setChecker(dict)
+        pending.extend(blocks)
+        self.palette = []
+        self._palette_index = {}
+        self.name_idx = np.empty(0, dtype=np.int16)
+        self.aux = np.empty(0, dtype=np.int32)
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.z = np.empty(0, dtype=np.int32)
+        self._pending = pending
+
+    @classmethod
+    def from_arrays(cls, palette, name_idx, x, y, z, aux=None):
+        """直接由列数组构建结构，name_idx 为 palette 中的下标"""
+        StructureObject = cls()
+        StructureObject.palette = list(palette)
+        StructureObject._palette_index = {name: i for i, name in enumerate(StructureObject.palette)}
+        StructureObject.name_idx = np.ascontiguousarray(name_idx, dtype=np.int16).ravel()
+        count = len(StructureObject.name_idx)
+        StructureObject.x = np.ascontiguousarray(x, dtype=np.int32).ravel()
+        StructureObject.y = np.ascontiguousarray(y, dtype=np.int32).ravel()
+        StructureObject.z = np.ascontiguousarray(z, dtype=np.int32).ravel()
+        if aux is None:
+            StructureObject.aux = np.zeros(count, dtype=np.int32)
+        else:
+            StructureObject.aux = np.ascontiguousarray(aux, dtype=np.int32).ravel()
+        if not (len(StructureObject.x) == len(StructureObject.y) == len(StructureObject.z) ==
+                len(StructureObject.aux) == count):
+            raise ValueError("各列数组长度不一致")
+        return StructureObject
+
+    def flush(self):
+        """把以字典形式追加的方块检查后写入列数组"""
+        pending = self._pending
+        if not pending:
+            return
+
+        palette = self.palette
+        palette_index = self._palette_index
+        names, auxs, xs, ys, zs = [], [], [], [], []
+        # 先比较精确类型，只有子类 (例如 bool) 才走 isinstance
+        t_int = int
+        t_str = str
+        for block in pending:
+            g = block.get
+            name = g("name", None)
+            if type(name) is not t_str and not isinstance(name, t_str):
                 raise Exception("方块数据缺少或存在错误的 name 参数")
-            
             # 确保 aux 参数是整数类型
-            aux_value = block.get("aux", 0)
-            if not isinstance(aux_value, int):
+            aux = g("aux", 0)
+            if type(aux) is not t_int and not isinstance(aux, t_int):
                 try:
-                    block["aux"] = int(aux_value)
+                    aux = int(aux)
                 except (ValueError, TypeError):
-                    block["aux"] = 0
-                    
-            if not isinstance(block.get("x", None), int):
+                    aux = 0
+            x = g("x", None)
+            if type(x) is not t_int and not isinstance(x, t_int):
                 raise Exception("方块数据存在错误的 x 参数")
-            if not isinstance(block.get("y", None), int):
+            y = g("y", None)
+            if type(y) is not t_int and not isinstance(y, t_int):
                 raise Exception("方块数据存在错误的 y 参数")
-            if not isinstance(block.get("z", None), int):
+            z = g("z", None)
+            if type(z) is not t_int and not isinstance(z, t_int):
                 raise Exception("方块数据存在错误的 z 参数")
 
-            block["aux"] = block.get("aux", 0)
+            idx = palette_index.get(name)
+            if idx is None:
+                idx = palette_index[name] = len(palette)
+                palette.append(name)
+            names.append(idx)
+            auxs.append(aux)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+
+        self.name_idx = np.concatenate((self.name_idx, np.array(names, dtype=np.int16)))
+        self.aux = np.concatenate((self.aux, np.array(auxs, dtype=np.int32)))
+        self.x = np.concatenate((self.x, np.array(xs, dtype=np.int32)))
+        self.y = np.concatenate((self.y, np.array(ys, dtype=np.int32)))
+        self.z = np.concatenate((self.z, np.array(zs, dtype=np.int32)))
+        pending.clear()
+
+    def block_at(self, index):
+        """取出第 index 个方块的字典形式"""
+        return {
+            "name": self.palette[int(self.name_idx[index])],
+            "aux": int(self.aux[index]),
+            "x": int(self.x[index]),
+            "y": int(self.y[index]),
+            "z": int(self.z[index])
+        }
+
+    def iter_blocks(self):
+        """按顺序逐个生成方块字典"""
+        self.flush()
+        palette = self.palette
+        for name, aux, x, y, z in zip(self.name_idx.tolist(), self.aux.tolist(),
+                                      self.x.tolist(), self.y.tolist(), self.z.tolist()):
+            yield {"name": palette[name], "aux": aux, "x": x, "y": y, "z": z}
+
+    def error_check(self):
+        # 字典在写入列数组时已逐项检查，这里只需确认下标都落在 palette 内
+        self.flush()
+        if len(self.name_idx) and (int(self.name_idx.min()) < 0 or
+                                   int(self.name_idx.max()) >= len(self.palette)):
+            raise Exception("方块数据缺少或存在错误的 name 参数")
 
     def save_as(self, buffer):
         self.error_check()
 
-        Json1 = list(self.blocks)
+        Json1 = list(self.iter_blocks())
 
         if isinstance(buffer, str):
             base_path = os.path.realpath(os.path.join(buffer, os.pardir))
             os.makedirs(base_path, exist_ok=True)
-            _file = open(buffer, "w+", encoding="utf-8")
-        else:
-            _file = buffer
+            if orjson is not None:
+                # orjson 直接输出紧凑的 UTF-8 字节，以二进制方式写入
+                with open(buffer, "wb") as _file:
+                    _file.write(orjson.dumps(Json1))
+            else:
+                with open(buffer, "w+", encoding="utf-8") as _file:
+                    json.dump(Json1, _file, separators=(',', ':'))
+            return
 
-        json.dump(Json1, _file, separators=(',', ':'))
+        _file = buffer
+        if orjson is not None:
+            _file.write(orjson.dumps(Json1).decode("utf-8"))
+        else:
+            json.dump(Json1, _file, separators=(',', ':'))
 
-class RunawayConverter:
+class RunawayConverter(BaseConverter):
     """RunAway格式转换器"""
+    
     def __init__(self, config):
-        self.config = config
-        self.color_to_block = {}
-        self.block_palette = []
-        self.block_data = []
+        super().__init__(config)
         self.block_data_values = []
-        self.width = 0
-        self.height = 0
-        self.depth = 1
-        self.pixels = None
-        self.original_width = 0
-        self.original_height = 0
-        
-    def load_block_mappings(self, selected_blocks):
-        """从block目录加载选中的方块映射"""
-        self.color_to_block = {}
-        block_dir = Path("block")
-        
-        if not block_dir.exists():
-            print(f"{Color.RED}❌ 错误: block目录不存在!{Color.RESET}")
-            return False
-            
-        for block_file in block_dir.glob("*.json"):
-            block_name = block_file.stem
-            if block_name in selected_blocks:
-                try:
-                    with open(block_file, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        json_lines = []
-                        for line in lines:
-                            if not line.strip().startswith('#'):
-                                json_lines.append(line)
-                        
-                        if json_lines:
-                            block_data = json.loads(''.join(json_lines))
-                            
-                            # 规范化方块数据，确保aux是整数
-                            processed_block_data = {}
-                            for color_key, block_info in block_data.items():
-                                if isinstance(color_key, str):
-                                    if isinstance(block_info, list) and len(block_info) >= 2:
-                                        # 确保aux值是整数
-                                        block_name = block_info[0]
-                                        aux_value = block_info[1]
-                                        try:
-                                            aux_int = int(aux_value)
-                                        except (ValueError, TypeError):
-                                            aux_int = 0
-                                        processed_block_data[color_key] = [block_name, aux_int]
-                                    else:
-                                        processed_block_data[color_key] = ["minecraft:white_concrete", 0]
-                                else:
-                                    color_str = str(color_key)
-                                    if isinstance(block_info, list) and len(block_info) >= 2:
-                                        block_name = block_info[0]
-                                        aux_value = block_info[1]
-                                        try:
-                                            aux_int = int(aux_value)
-                                        except (ValueError, TypeError):
-                                            aux_int = 0
-                                        processed_block_data[color_str] = [block_name, aux_int]
-                                    else:
-                                        processed_block_data[color_str] = ["minecraft:white_concrete", 0]
-                            
-                            self.color_to_block.update(processed_block_data)
-                            print(f"{Color.GREEN}✅ 已加载: {block_name}{Color.RESET}")
-                        else:
-                            print(f"{Color.YELLOW}❌ 文件 {block_file} 中没有有效的JSON内容{Color.RESET}")
-                except Exception as e:
-                    print(f"{Color.RED}❌ 加载 {block_file} 时出错: {e}{Color.RESET}")
-        
-        if not self.color_to_block:
-            print(f"{Color.RED}❌ 错误: 没有加载任何方块映射!{Color.RESET}")
-            return False
-            
-        print(f"{Color.GREEN}✅ 总共加载 {len(self.color_to_block)} 种颜色映射{Color.RESET}")
-        return True
-        
-    def color_distance(self, c1, c2):
-        """计算两个颜色之间的感知距离"""
-        r1, g1, b1 = c1
-        r2, g2, b2 = c2
-        r_mean = (r1 + r2) / 2
-        
-        r_diff = r1 - r2
-        g_diff = g1 - g2
-        b_diff = b1 - b2
-        
-        return math.sqrt(
-            (2 + r_mean/256) * (r_diff**2) +
-            4 * (g_diff**2) +
-            (2 + (255 - r_mean)/256) * (b_diff**2)
-        )
-        
-    def find_closest_color(self, color):
-        """找到最接近的颜色映射"""
-        r, g, b = color[:3]
-        closest_color = None
-        min_distance = float('inf')
-        
-        for target_color_str in self.color_to_block:
-            try:
-                if target_color_str.startswith('(') and target_color_str.endswith(')'):
-                    color_str = target_color_str[1:-1]
-                    color_values = [int(x.strip()) for x in color_str.split(',')]
-                    target_color = tuple(color_values[:3])
-                else:
-                    color_values = [int(x.strip()) for x in target_color_str.split(',')]
-                    target_color = tuple(color_values[:3])
-                
-                distance = self.color_distance((r, g, b), target_color)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_color = target_color_str
-            except Exception:
-                continue
-                
-        if closest_color:
-            block_info = self.color_to_block[closest_color]
-            if isinstance(block_info, list) and len(block_info) >= 2:
-                block_name = block_info[0]
-                aux_value = block_info[1]
-                
-                # 确保aux是整数
-                try:
-                    aux_int = int(aux_value)
-                except (ValueError, TypeError):
-                    aux_int = 0
-                    
-                return block_name, aux_int
-            else:
-                return "minecraft:white_concrete", 0
-        else:
-            return "minecraft:white_concrete", 0
     
-    def load_image(self, image_path):
-        """加载图片，支持PNG和JPG格式"""
-        print(f"{Color.CYAN}🖼️  正在加载图片...{Color.RESET}")
-        ext = os.path.splitext(image_path)[1].lower()
-        
-        if ext == '.png':
-            reader = png.Reader(filename=image_path)
-            width, height, pixels, metadata = reader.asDirect()
-            
-            image_data = []
-            for row in pixels:
-                image_data.append(row)
-            
-            if metadata['alpha']:
-                self.pixels = np.array(image_data, dtype=np.uint8).reshape(height, width, 4)[:, :, :3]
-            else:
-                self.pixels = np.array(image_data, dtype=np.uint8).reshape(height, width, 3)
-                
-            self.original_width = width
-            self.original_height = height
-            
-        elif ext in ('.jpg', '.jpeg'):
-            img = Image.open(image_path)
-            img = img.convert('RGB')
-            self.original_width, self.original_height = img.size
-            self.pixels = np.array(img)
-            
-        else:
-            raise ValueError(f"不支持的图片格式: {ext}")
-        
-        print(f"{Color.GREEN}✅ 图片加载完成: {self.original_width} × {self.original_height} 像素{Color.RESET}")
-            
-    def calculate_best_ratio(self, target_width, target_height):
-        """计算最佳保持比例的尺寸"""
-        orig_ratio = self.original_width / self.original_height
-        target_ratio = target_width / target_height
-        
-        if abs(orig_ratio - target_ratio) < 0.05:
-            return target_width, target_height
-        
-        if orig_ratio > target_ratio:
-            best_width = target_width
-            best_height = int(target_width / orig_ratio)
-        else:
-            best_height = target_height
-            best_width = int(target_height * orig_ratio)
-            
-        return best_width, best_height
+    def fill_block_data(self, rows):
+        """除方块索引外，RunAway 还需按同一组调色板行号写入方块数据值"""
+        super().fill_block_data(rows)
+        self.block_data_values = np.empty((self.depth, self.height, self.width), dtype=np.int16)
+        np.take(self._palette_values, rows, out=self.block_data_values[0], mode='clip')
     
-    def set_size(self, width, height):
-        """设置生成结构的尺寸"""
-        self.width = max(1, width)
-        self.height = max(1, height)
-        print(f"{Color.CYAN}📐 设置生成尺寸: {self.width} × {self.height} 方块{Color.RESET}")
-            
-    def generate_block_data(self):
-        """生成方块数据"""
-        print(f"{Color.CYAN}🔨 正在生成方块数据...{Color.RESET}")
-        
-        self.block_palette = []
-        for block_info in self.color_to_block.values():
-            if isinstance(block_info, list) and len(block_info) >= 1:
-                block_name = block_info[0]
-                if block_name not in self.block_palette:
-                    self.block_palette.append(block_name)
-                    
-        print(f"{Color.CYAN}🎨 初始化调色板: {len(self.block_palette)} 种方块{Color.RESET}")
-        
-        self.block_data = np.zeros((self.depth, self.height, self.width), dtype=int)
-        self.block_data_values = np.zeros((self.depth, self.height, self.width), dtype=int)
-        
-        scale_x = self.original_width / self.width
-        scale_y = self.original_height / self.height
-        
-        print(f"{Color.CYAN}🔄 正在处理像素数据...{Color.RESET}")
-        total_pixels = self.width * self.height
-        processed_pixels = 0
-        
-        progress_thread = ProgressDisplay(total_pixels, "处理像素", self.config)
-        progress_thread.start()
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                src_x = int(x * scale_x)
-                src_y = int(y * scale_y)
-                
-                region = self.pixels[
-                    int(src_y):min(int((y+1)*scale_y), self.original_height),
-                    int(src_x):min(int((x+1)*scale_x), self.original_width)
-                ]
-                if region.size == 0:
-                    avg_color = (255, 255, 255)
-                else:
-                    avg_color = tuple(np.mean(region, axis=(0, 1)).astype(int))
-                
-                block_name, block_data = self.find_closest_color(avg_color)
-                if block_name in self.block_palette:
-                    block_index = self.block_palette.index(block_name)
-                else:
-                    block_index = 0
-                
-                self.block_data[0, y, x] = block_index
-                self.block_data_values[0, y, x] = block_data
-                
-                processed_pixels += 1
-                progress_thread.update(processed_pixels)
-        
-        progress_thread.stop()
-        progress_thread.join()
-        
-        print(f"{Color.GREEN}✅ 方块数据生成完成{Color.RESET}")
-
-    def convert(self, input_image, output_path, width=None, height=None, selected_blocks=None):
-        """转换入口函数"""
-        if selected_blocks is None:
-            selected_blocks = []
-            
-        print(f"{Color.CYAN}🚀 开始转换流程...{Color.RESET}")
-        
-        if not self.load_block_mappings(selected_blocks):
-            return None
-            
-        try:
-            self.load_image(input_image)
-            
-            if width is None or height is None:
-                self.set_size(self.original_width, self.original_height)
-            else:
-                best_width, best_height = self.calculate_best_ratio(width, height)
-                
-                if best_width != width or best_height != height:
-                    print(f"\n{Color.YELLOW}⚠️  建议使用保持比例的最佳尺寸: {best_width}x{best_height} (原图比例 {self.original_width}:{self.original_height}){Color.RESET}")
-                    choice = input("是否使用建议尺寸? (y/n): ").strip().lower()
-                    if choice == 'y':
-                        self.set_size(best_width, best_height)
-                    else:
-                        self.set_size(width, height)
-                else:
-                    self.set_size(width, height)
-                
-            self.generate_block_data()
-            return self.save_runaway(output_path)
-        except Exception as e:
-            print(f"{Color.RED}❌ 转换过程中发生错误: {e}{Color.RESET}")
-            import traceback
-            traceback.print_exc()
-            return None
+    def save(self, output_path):
+        return self.save_runaway(output_path)
     
     def save_runaway(self, output_path):
         """保存为RunAway格式文件"""
@@ -432,39 +258,26 @@ class RunawayConverter:
         if not output_path.lower().endswith('.json'):
             output_path += '.json'
         
-        runaway = RunAway()
-        
-        total_blocks = self.width * self.height
-        processed_blocks = 0
-        
-        progress_thread = ProgressDisplay(total_blocks, "保存方块", self.config)
-        progress_thread.start()
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                block_index = self.block_data[0, y, x]
-                block_data = int(self.block_data_values[0, y, x])  # 确保是整数
-                block_name = self.block_palette[block_index]
-                
-                block = {
-                    "name": block_name,
-                    "aux": block_data,
-                    "x": x,
-                    "y": 0,  # 单层结构
-                    "z": y
-                }
-                runaway.blocks.append(block)
-                
-                processed_blocks += 1
-                progress_thread.update(processed_blocks)
-        
-        progress_thread.stop()
-        progress_thread.join()
+        # 像素按行优先排列：x 为列号，z 为行号，单层结构 y 恒为 0
+        zs, xs = np.indices((self.height, self.width), dtype=np.int32)
+        runaway = RunAway.from_arrays(
+            self.block_palette,
+            self.block_data[0],
+            xs,
+            np.zeros(self.width * self.height, dtype=np.int32),
+            zs,
+            self.block_data_values[0]
+        )
         
         runaway.save_as(output_path)
         
         print(f"{Color.GREEN}✅ RunAway文件保存完成: {output_path}{Color.RESET}")
         return self.width, self.height, self.width * self.height
 
+
 # 兼容性别名
-Converter = RunawayConverter
\ No newline at end of file
+Converter = RunawayConverter
+
+def convert_batch(jobs, config, selected_blocks, workers=None):
+    """多进程批量转换为RunAway，jobs 为 (输入图片, 输出路径, 宽, 高) 列表，按顺序返回每个结果"""
+    return _common.convert_batch(Converter, jobs, config, selected_blocks, workers)
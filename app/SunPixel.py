@@ -1,23 +1,43 @@
 import numpy as np
-import png
 from PIL import Image
 import nbtlib
 from nbtlib.tag import Byte, Short, Int, Long, Float, Double, String, List, Compound
 import os
+import io
+import gzip
 import time
 import math
 import json
 from pathlib import Path
 import datetime
+import tempfile
+import atexit
+import weakref
 import urllib.request
 import urllib.error
 import re
 import sys
 import threading
+import traceback
 from io import BytesIO, StringIO, TextIOBase, IOBase
 from typing import Dict, List, Union
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 读写结构、schem、配置文件时使用的缓冲区大小
+FILE_BUFFER_SIZE = 1 << 18
+
+# 公告中的发布日期，例如 2025-11-28
+DATE_PATTERN = re.compile(r'\b(\d{4}-\d{1,2}-\d{1,2})\b')
+
+# 最新公告的本地缓存，有效期内再次启动程序时不再联网获取
+ANNOUNCEMENT_CACHE_PATH = Path(tempfile.gettempdir()) / "sunpixel_announcement.md"
+ANNOUNCEMENT_CACHE_TTL = 300  # 秒
+
 # 创建必要的目录结构
 Path("Format").mkdir(exist_ok=True)
 
@@ -34,12 +54,61 @@ class Color(Enum):
     BOLD = '\033[1m'
     GRAY = '\033[90m'
 
+# 常用颜色代码，省去每次 Color.X.value 的枚举属性查找
+COLOR_GREEN = Color.GREEN.value
+COLOR_YELLOW = Color.YELLOW.value
+COLOR_CYAN = Color.CYAN.value
+COLOR_RESET = Color.RESET.value
+
 class OutputFormat(Enum):
     """输出格式枚举"""
     SCHEMATIC = "schem"
     RUNAWAY = "json"
     LITEMATICA = "litematic"
 
+# y/n 提问的合法回答；回车默认为"是"的提问使用 YES_OR_DEFAULT_ANSWERS
+YES_ANSWERS = frozenset({'y', 'yes'})
+YES_OR_DEFAULT_ANSWERS = frozenset({'', 'y', 'yes'})
+NO_ANSWERS = frozenset({'n', 'no'})
+
+# 输出格式对应的转换器模块 (Format 目录下的文件名) 和转换器类名
+CONVERTERS = {
+    OutputFormat.SCHEMATIC: ("schem", "schemConverter"),
+    OutputFormat.RUNAWAY: ("runaway", "RunawayConverter"),
+    OutputFormat.LITEMATICA: ("litematica", "LitematicaConverter"),
+}
+
+# 各处输出使用的分隔线
+DIVIDER = '=' * 50
+
+# 输出颜色标签，按 colored_output 设置选其一，模板中的 {g}{y}{c}{r} 由它填充
+COLOR_TAGS = {'g': COLOR_GREEN, 'y': COLOR_YELLOW, 'c': COLOR_CYAN, 'r': COLOR_RESET}
+PLAIN_TAGS = {'g': '', 'y': '', 'c': '', 'r': ''}
+
+# 转换完成后的统计信息模板
+STATS_TEMPLATE = (
+    "\n{g}✅ 转换成功完成! 耗时: {elapsed:.2f}秒{r}\n"
+    f"{{c}}{DIVIDER}{{r}}\n"
+    "{y}📐 生成结构尺寸: {width} × {height} 方块{r}\n"
+    "{y}🧱 总方块数量: {block_count} 个{r}\n"
+    "{y}💾 输出文件: {output_path}{r}\n"
+    "{y}🎨 使用的方块类型: {block_names}{r}\n"
+    f"{{c}}{DIVIDER}{{r}}\n"
+)
+
+# 自动修复完成后的统计信息模板
+FIX_STATS_TEMPLATE = (
+    "\n{g}✅ 自动验证并修复成功完成! 耗时: {elapsed:.2f}秒{r}\n"
+    f"{{c}}{DIVIDER}{{r}}\n"
+    "{y}📐 生成结构尺寸: {width} × {height} 方块{r}\n"
+    "{y}🧱 总方块数量: {block_count} 个{r}\n"
+    "{c}📁 原输出文件: {backup_path}{r}\n"
+    "{y}💾 输出文件: {output_path}{r}\n"
+    "{g}🔧 修复内容: {fix_message}{r}\n"
+    "{y}🎨 使用的方块类型: {block_names}{r}\n"
+    f"{{c}}{DIVIDER}{{r}}\n"
+)
+
 class TypeCheckList(list):
     """类型检查列表"""
     def __init__(self):
@@ -51,97 +120,255 @@ class TypeCheckList(list):
         return self
     
     def append(self, obj):
-        if self.checker and not isinstance(obj, self.checker):
-            raise Exception(f"类型错误: 期望 {self.checker}, 得到 {type(obj)}")
+        checker = self.checker
+        # 先比较精确类型，只有子类才走 isinstance
+        if checker and type(obj) is not checker and not isinstance(obj, checker):
+            raise Exception(f"类型错误: 期望 {checker}, 得到 {type(obj)}")
         super().append(obj)
     
     def extend(self, iterable):
-        for obj in iterable:
-            self.append(obj)
+        # 整批检查通过后一次性追加，出错时列表保持不变
+        objs = list(iterable)
+        checker = self.checker
+        if checker:
+            for obj in objs:
+                if type(obj) is not checker and not isinstance(obj, checker):
+                    raise Exception(f"类型错误: 期望 {checker}, 得到 {type(obj)}")
+        super().extend(objs)
+
+class RunAwayBlocks:
+    """RunAway.blocks 的兼容视图：追加时检查类型，读取时才临时生成字典"""
+    def __init__(self, owner):
+        self._owner = owner
+
+    def append(self, obj):
+        self._owner._pending.append(obj)
+
+    def extend(self, iterable):
+        self._owner._pending.extend(iterable)
+
+    def __len__(self):
+        return len(self._owner.name_idx) + len(self._owner._pending)
+
+    def __iter__(self):
+        return self._owner.iter_blocks()
+
+    def __getitem__(self, index):
+        owner = self._owner
+        owner.flush()
+        if isinstance(index, slice):
+            return [owner.block_at(i) for i in range(len(owner.name_idx))[index]]
+        return owner.block_at(index)
 
 class RunAway:
-    """RunAway 官方结构文件对象"""
+    """RunAway 官方结构文件对象
+
+    方块按列存储：name 为 palette 下标 (int16)，aux/x/y/z 为 int32 数组。
+    blocks 属性保留原来的字典列表接口，可整体赋值替换全部方块；修改取出的字典不会写回。
+    """
     def __init__(self):
-        self.blocks: List[Dict] = TypeCheckList().setChecker(dict)
+        self.palette: List[str] = []
+        self._palette_index: Dict[str, int] = {}
+        self.name_idx = np.empty(0, dtype=np.int16)
+        self.aux = np.empty(0, dtype=np.int32)
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.z = np.empty(0, dtype=np.int32)
+        # 通过 blocks.append/extend 加入、尚未写入列数组的字典
+        self._pending: List[Dict] = TypeCheckList().setChecker(dict)
 
     def __setattr__(self, name, value):
-        if not hasattr(self, name):
+        if name == "blocks":
+            # blocks 是属性，整体赋值交给下面的 setter 检查和转换
             super().__setattr__(name, value)
-        elif isinstance(value, type(getattr(self, name))):
+        elif not hasattr(self, name):
             super().__setattr__(name, value)
         else:
-            raise Exception(f"无法修改 {name} 属性")
+            current_type = type(getattr(self, name))
+            if type(value) is not current_type and not isinstance(value, current_type):
+                raise Exception(f"无法修改 {name} 属性")
+            super().__setattr__(name, value)
 
     def __delattr__(self, name):
         raise Exception("无法删除任何属性")
 
-    def get_volume(self):
-        if not self.blocks:
-            return [0, 0, 0], [0, 0, 0]
-            
-        origin_min, origin_max = [0, 0, 0], [0, 0, 0]
-        
-        def pos_iter():
-            for i in self.blocks:
-                yield (i["x"], i["y"], i["z"])
-        
-        first = next(pos_iter())
-        origin_min = list(first)
-        origin_max = list(first)
-        
-        for pos in pos_iter():
-            for i in range(3):
-                origin_min[i] = min(origin_min[i], pos[i])
-                origin_max[i] = max(origin_max[i], pos[i])
+    @property
+    def blocks(self):
+        return RunAwayBlocks(self)
 
-        return origin_min, origin_max
+    @blocks.setter
+    def blocks(self, value):
+        """整体替换方块列表，兼容原来直接给 blocks 赋值 (TypeCheckList 等列表) 的用法"""
+        if not isinstance(value, (list, RunAwayBlocks)):
+            raise Exception("无法修改 blocks 属性")
+        # 先取出全部方块再清空，value 也可以是本结构自己的 blocks 视图
+        blocks = list(value)
+        pending = TypeCheckList().setChecker(dict)
+        pending.extend(blocks)
+        self.palette = []
+        self._palette_index = {}
+        self.name_idx = np.empty(0, dtype=np.int16)
+        self.aux = np.empty(0, dtype=np.int32)
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.z = np.empty(0, dtype=np.int32)
+        self._pending = pending
 
-    def error_check(self):
-        for block in self.blocks:
-            if not isinstance(block.get("name", None), str):
+    @classmethod
+    def from_arrays(cls, palette, name_idx, x, y, z, aux=None):
+        """直接由列数组构建结构，name_idx 为 palette 中的下标"""
+        StructureObject = cls()
+        StructureObject.palette = list(palette)
+        StructureObject._palette_index = {name: i for i, name in enumerate(StructureObject.palette)}
+        StructureObject.name_idx = np.ascontiguousarray(name_idx, dtype=np.int16).ravel()
+        count = len(StructureObject.name_idx)
+        StructureObject.x = np.ascontiguousarray(x, dtype=np.int32).ravel()
+        StructureObject.y = np.ascontiguousarray(y, dtype=np.int32).ravel()
+        StructureObject.z = np.ascontiguousarray(z, dtype=np.int32).ravel()
+        if aux is None:
+            StructureObject.aux = np.zeros(count, dtype=np.int32)
+        else:
+            StructureObject.aux = np.ascontiguousarray(aux, dtype=np.int32).ravel()
+        if not (len(StructureObject.x) == len(StructureObject.y) == len(StructureObject.z) ==
+                len(StructureObject.aux) == count):
+            raise ValueError("各列数组长度不一致")
+        return StructureObject
+
+    def flush(self):
+        """把以字典形式追加的方块检查后写入列数组"""
+        pending = self._pending
+        if not pending:
+            return
+
+        palette = self.palette
+        palette_index = self._palette_index
+        names, auxs, xs, ys, zs = [], [], [], [], []
+        # 先比较精确类型，只有子类 (例如 bool) 才走 isinstance
+        t_int = int
+        t_str = str
+        for block in pending:
+            g = block.get
+            name = g("name", None)
+            if type(name) is not t_str and not isinstance(name, t_str):
                 raise Exception("方块数据缺少或存在错误的 name 参数")
-            if not isinstance(block.get("aux", 0), int):
+            aux = g("aux", 0)
+            if type(aux) is not t_int and not isinstance(aux, t_int):
                 raise Exception("方块数据存在错误的 aux 参数")
-            if not isinstance(block.get("x", None), int):
+            x = g("x", None)
+            if type(x) is not t_int and not isinstance(x, t_int):
                 raise Exception("方块数据存在错误的 x 参数")
-            if not isinstance(block.get("y", None), int):
+            y = g("y", None)
+            if type(y) is not t_int and not isinstance(y, t_int):
                 raise Exception("方块数据存在错误的 y 参数")
-            if not isinstance(block.get("z", None), int):
+            z = g("z", None)
+            if type(z) is not t_int and not isinstance(z, t_int):
                 raise Exception("方块数据存在错误的 z 参数")
 
-            block["aux"] = block.get("aux", 0)
+            idx = palette_index.get(name)
+            if idx is None:
+                idx = palette_index[name] = len(palette)
+                palette.append(name)
+            names.append(idx)
+            auxs.append(aux)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+
+        self.name_idx = np.concatenate((self.name_idx, np.array(names, dtype=np.int16)))
+        self.aux = np.concatenate((self.aux, np.array(auxs, dtype=np.int32)))
+        self.x = np.concatenate((self.x, np.array(xs, dtype=np.int32)))
+        self.y = np.concatenate((self.y, np.array(ys, dtype=np.int32)))
+        self.z = np.concatenate((self.z, np.array(zs, dtype=np.int32)))
+        pending.clear()
+
+    def block_at(self, index):
+        """取出第 index 个方块的字典形式"""
+        return {
+            "name": self.palette[int(self.name_idx[index])],
+            "aux": int(self.aux[index]),
+            "x": int(self.x[index]),
+            "y": int(self.y[index]),
+            "z": int(self.z[index])
+        }
+
+    def iter_blocks(self):
+        """按顺序逐个生成方块字典"""
+        self.flush()
+        palette = self.palette
+        for name, aux, x, y, z in zip(self.name_idx.tolist(), self.aux.tolist(),
+                                      self.x.tolist(), self.y.tolist(), self.z.tolist()):
+            yield {"name": palette[name], "aux": aux, "x": x, "y": y, "z": z}
+
+    def get_volume(self):
+        self.flush()
+        if not len(self.name_idx):
+            return [0, 0, 0], [0, 0, 0]
+            
+        origin_min = [int(self.x.min()), int(self.y.min()), int(self.z.min())]
+        origin_max = [int(self.x.max()), int(self.y.max()), int(self.z.max())]
+
+        return origin_min, origin_max
+
+    def error_check(self):
+        # 字典在写入列数组时已逐项检查，这里只需确认下标都落在 palette 内
+        self.flush()
+        if len(self.name_idx) and (int(self.name_idx.min()) < 0 or
+                                   int(self.name_idx.max()) >= len(self.palette)):
+            raise Exception("方块数据缺少或存在错误的 name 参数")
 
     @classmethod
-    def from_buffer(cls, buffer: Union[str, IOBase, BytesIO, StringIO]):
+    def from_buffer(cls, buffer: Union[str, IOBase, BytesIO, StringIO], unchecked: bool = False):
+        """读取 RunAway 结构文件；unchecked=True 时信任数据来源，跳过逐项的 dict 类型检查"""
         if isinstance(buffer, str):
-            _file = open(buffer, "rb")
+            _file = open(buffer, "rb", buffering=FILE_BUFFER_SIZE)
         elif isinstance(buffer, bytes):
             _file = BytesIO(buffer)
         else:
             _file = buffer
         
-        Json1: List[Dict] = json.load(fp=_file)
+        # 一次读入全部内容再解析，orjson 可用时优先使用
+        try:
+            data = _file.read()
+        finally:
+            if _file is not buffer:
+                _file.close()
+        if orjson is not None:
+            Json1: List[Dict] = orjson.loads(data)
+        else:
+            Json1: List[Dict] = json.loads(data)
 
         StructureObject = cls()
-        StructureObject.blocks.extend(Json1)
+        if unchecked:
+            list.extend(StructureObject._pending, Json1)
+        else:
+            StructureObject.blocks.extend(Json1)
 
         return StructureObject
 
     def save_as(self, buffer: Union[str, IOBase, StringIO]):
         self.error_check()
 
-        Json1: List[Dict] = list(self.blocks)
+        Json1: List[Dict] = list(self.iter_blocks())
 
         if isinstance(buffer, str):
             base_path = os.path.realpath(os.path.join(buffer, os.pardir))
             os.makedirs(base_path, exist_ok=True)
-            _file = open(buffer, "w+", encoding="utf-8")
-        else:
-            _file = buffer
+            if orjson is not None:
+                # orjson 直接输出紧凑的 UTF-8 字节，以二进制方式写入
+                with open(buffer, "wb", buffering=FILE_BUFFER_SIZE) as _file:
+                    _file.write(orjson.dumps(Json1))
+            else:
+                with open(buffer, "w+", encoding="utf-8", buffering=FILE_BUFFER_SIZE) as _file:
+                    json.dump(Json1, _file, separators=(',', ':'))
+            return
 
+        _file = buffer
         if not isinstance(_file, TextIOBase):
             raise TypeError("buffer 参数需要文本缓冲区类型")
-        json.dump(Json1, _file, separators=(',', ':'))
+        if orjson is not None:
+            _file.write(orjson.dumps(Json1).decode("utf-8"))
+        else:
+            json.dump(Json1, _file, separators=(',', ':'))
 
     @classmethod
     def is_this_file(cls, data, data_type: str):
@@ -168,6 +395,12 @@ class ProgressDisplay(threading.Thread):
         self.current = 0
         self.running = True
         self.daemon = True
+        # stop() 时立即唤醒刷新循环，join 不必等满一个刷新间隔
+        self._wake = threading.Event()
+        # 预先生成 0~30 格的全部进度条，刷新时按已完成格数直接取用
+        bar_length = 30
+        self._bars_plain = ['█' * i + '░' * (bar_length - i) for i in range(bar_length + 1)]
+        self._bars_color = [f'{Color.GREEN.value}█{Color.RESET.value}' * i + f'{Color.GRAY.value}░{Color.RESET.value}' * (bar_length - i) for i in range(bar_length + 1)]
         
     def update(self, value):
         """更新进度"""
@@ -176,47 +409,56 @@ class ProgressDisplay(threading.Thread):
     def stop(self):
         """停止进度显示"""
         self.running = False
+        self._wake.set()
         
     def run(self):
         """运行进度显示"""
         use_color = self.config.getboolean('ui', 'colored_output', True)
+        bars = self._bars_color if use_color else self._bars_plain
+        bar_length = len(bars) - 1
         
+        last_current = None
         while self.running and self.current < self.total:
-            progress = (self.current / self.total) * 100
-            bar_length = 30
-            filled_length = int(bar_length * self.current // self.total)
-            
-            if use_color:
-                bar = f'{Color.GREEN.value}█{Color.RESET.value}' * filled_length + f'{Color.GRAY.value}░{Color.RESET.value}' * (bar_length - filled_length)
-            else:
-                bar = '█' * filled_length + '░' * (bar_length - filled_length)
-            
-            sys.stdout.write(f'\r📊 {self.description}: [{bar}] {self.current}/{self.total} ({progress:.1f}%)')
-            sys.stdout.flush()
-            time.sleep(0.1)
+            current = self.current
+            # 进度没有变化时不重绘，省去重复的输出和 flush
+            if current != last_current:
+                last_current = current
+                progress = (current / self.total) * 100
+                filled_length = int(bar_length * current // self.total)
+                bar = bars[filled_length]
+                
+                sys.stdout.write(f'\r📊 {self.description}: [{bar}] {current}/{self.total} ({progress:.1f}%)')
+                sys.stdout.flush()
+            self._wake.wait(0.1)
         
         if self.current >= self.total:
             progress = 100.0
-            bar_length = 30
-            if use_color:
-                bar = f'{Color.GREEN.value}█{Color.RESET.value}' * bar_length
-            else:
-                bar = '█' * bar_length
+            bar = bars[bar_length]
             sys.stdout.write(f'\r📊 {self.description}: [{bar}] {self.current}/{self.total} ({progress:.1f}%) ✅\n')
             sys.stdout.flush()
 
 class Config:
     """JSON配置管理器"""
+    # 所有存活的配置实例，退出时由同一个 atexit 回调统一写回
+    _instances = weakref.WeakSet()
+    
     def __init__(self):
         self.config_path = Path("config.json")
         self.config_data = {}
+        # getboolean 的解析结果，配置内容变化时清空
+        self._boolean_cache = {}
+        # set() 只修改内存并标记为未保存，退出程序时统一写回文件
+        self._dirty = False
+        Config._instances.add(self)
         self.load()
         
     def load(self):
         """加载配置文件"""
+        self._boolean_cache.clear()
+        self._dirty = False
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
+                with open(self.config_path, 'r', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
                     self.config_data = json.load(f)
             except json.JSONDecodeError:
                 print(f"⚠️  配置文件损坏，使用默认配置")
@@ -226,21 +468,43 @@ class Config:
             
     def create_default(self):
         """创建默认配置"""
+        self._boolean_cache.clear()
         self.config_data = {
             "general": {
                 "language": "zh_CN",  # 程序语言，目前支持 zh_CN
                 "output_directory": "output"  # 输出文件目录
             },
             "ui": {
-                "colored_output": True  # 是否启用彩色控制台输出
+                "colored_output": True,  # 是否启用彩色控制台输出
+                "show_progress": True  # 转换时是否显示进度条
+            },
+            "conversion": {
+                "color_metric": "redmean"  # 颜色匹配算法: redmean 或 lab (CIE76)
             }
         }
         self.save()
         
     def save(self):
         """保存配置文件"""
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.config_data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(self.config_path, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+                f.write(orjson.dumps(self.config_data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        else:
+            with open(self.config_path, 'w', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
+                json.dump(self.config_data, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+        self._dirty = False
+        
+    def flush(self):
+        """有未保存的修改时写回配置文件"""
+        if self._dirty:
+            self.save()
+    
+    @classmethod
+    def flush_all(cls):
+        """写回所有配置实例中未保存的修改，只在程序退出时注册一次"""
+        for config in list(cls._instances):
+            config.flush()
             
     def get(self, section, key, fallback=None):
         """获取配置值"""
@@ -251,23 +515,32 @@ class Config:
             
     def getboolean(self, section, key, fallback=False):
         """获取布尔配置值"""
+        cache_key = (section, key, fallback)
+        cached = self._boolean_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
             value = self.get(section, key, fallback)
             if isinstance(value, bool):
-                return value
+                result = value
             elif isinstance(value, str):
-                return value.lower() in ['true', 'yes', '1', 'y']
+                result = value.lower() in ['true', 'yes', '1', 'y']
             else:
-                return bool(value)
+                result = bool(value)
         except:
             return fallback
+        self._boolean_cache[cache_key] = result
+        return result
             
     def set(self, section, key, value):
         """设置配置值"""
+        self._boolean_cache.clear()
         if section not in self.config_data:
             self.config_data[section] = {}
         self.config_data[section][key] = value
-        self.save()
+        self._dirty = True
+
+atexit.register(Config.flush_all)
 
 def get_gradient_colors(num_colors, use_color=True):
     """生成渐变颜色序列"""
@@ -359,11 +632,11 @@ def display_logo(config):
     print()
 
 def extract_date_from_content(content):
-    date_pattern = r'\b(\d{4}-\d{1,2}-\d{1,2})\b'
-    matches = re.findall(date_pattern, content)
+    # 只需要第一个日期，用 search 找到即停
+    match = DATE_PATTERN.search(content)
     
-    if matches:
-        return matches[0]
+    if match:
+        return match.group(1)
         
     return datetime.datetime.now().strftime("%Y-%m-%d")
 
@@ -371,8 +644,26 @@ def get_latest_announcement():
     announcement_url = "https://raw.githubusercontent.com/suibian-sun/SunPixel/refs/heads/main/app/Changelog/new.md"
     
     try:
-        with urllib.request.urlopen(announcement_url, timeout=10) as response:
-            content = response.read().decode('utf-8').strip()
+        content = None
+        try:
+            if time.time() - ANNOUNCEMENT_CACHE_PATH.stat().st_mtime < ANNOUNCEMENT_CACHE_TTL:
+                content = ANNOUNCEMENT_CACHE_PATH.read_text(encoding='utf-8')
+        except OSError:
+            pass
+        
+        if content is None:
+            # 请求 gzip 压缩的响应，服务器未压缩时按原样读取
+            request = urllib.request.Request(announcement_url, headers={'Accept-Encoding': 'gzip'})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                raw = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    raw = gzip.decompress(raw)
+            content = raw.decode('utf-8').strip()
+            
+            try:
+                ANNOUNCEMENT_CACHE_PATH.write_text(content, encoding='utf-8')
+            except OSError:
+                pass
         
         date_str = extract_date_from_content(content)
         return date_str, content
@@ -398,9 +689,16 @@ def format_announcement_content(content):
 
 def format_announcement_box(date_str, content):
     """格式化公告显示框，自动调整边框宽度"""
-    formatted_content = format_announcement_content(content)
-    lines = formatted_content.split('\n')
-    max_line_length = max(len(line) for line in lines if line.strip())
+    # 与 format_announcement_content 相同的空行规则，但直接得到行列表，并在同一遍中求最长行
+    source_lines = content.split('\n')
+    lines = []
+    max_line_length = 0
+    for i, line in enumerate(source_lines):
+        lines.append(line)
+        if line.strip() and len(line) > max_line_length:
+            max_line_length = len(line)
+        if "更新内容如下" in line and i + 1 < len(source_lines) and source_lines[i + 1].strip():
+            lines.append("")
     
     box_width = max(60, max_line_length + 4)
     
@@ -414,19 +712,23 @@ def format_announcement_box(date_str, content):
     formatted_lines.append(title_line.ljust(box_width - 1) + "║")
     formatted_lines.append(middle_border)
     
+    empty_line = "║" + " " * (box_width - 2) + "║"
+    segment_width = box_width - 4
+    
     for line in lines:
         if line.strip():
-            while len(line) > box_width - 4:
-                segment = line[:box_width - 4]
-                formatted_line = f"║ {segment}"
+            # 按固定宽度切段，只有最后一段为空白时才省略
+            last_start = max(0, (len(line) - 1) // segment_width) * segment_width
+            for start in range(0, last_start, segment_width):
+                formatted_line = f"║ {line[start:start + segment_width]}"
                 formatted_lines.append(formatted_line.ljust(box_width - 1) + "║")
-                line = line[box_width - 4:]
             
-            if line.strip():
-                formatted_line = f"║ {line}"
+            segment = line[last_start:]
+            if segment.strip():
+                formatted_line = f"║ {segment}"
                 formatted_lines.append(formatted_line.ljust(box_width - 1) + "║")
         else:
-            formatted_lines.append(f"║{' ' * (box_width - 2)}║")
+            formatted_lines.append(empty_line)
     
     formatted_content = [top_border] + formatted_lines + [bottom_border]
     
@@ -449,13 +751,17 @@ def display_announcement(config):
 def get_block_display_name(block_file):
     """从JSON文件的第一行注释中获取方块类型的中文名称"""
     try:
-        with open(block_file, 'r', encoding='utf-8') as f:
+        # 名称就在第一行注释里，只读第一行即可；按整行读取，较长的名称或多字节字符不会被截断
+        with open(block_file, 'rb') as f:
             first_line = f.readline().strip()
-            if first_line.startswith('# '):
-                return first_line[2:] 
-    except:
+        if first_line.startswith(b'# '):
+            return first_line[2:].decode('utf-8')
+    except (OSError, UnicodeDecodeError):
         pass
-    return block_file.stem 
+    return Path(block_file).stem 
+
+# 各方块文件的显示名称，按路径缓存并记录文件的 (修改时间, 大小)
+_block_display_name_cache = {}
 
 def get_available_blocks():
     """获取可用的方块类型及其显示名称"""
@@ -463,12 +769,25 @@ def get_available_blocks():
     if not block_dir.exists():
         block_dir.mkdir(exist_ok=True)
         create_default_block_files()
-        
+    
+    # 目录的修改时间只反映文件增删，改写文件内容时不会变化，因此逐个文件比较修改时间和大小，
+    # 只重新读取有变化的文件
     blocks_info = {}
-    for block_file in block_dir.glob("*.json"):
-        display_name = get_block_display_name(block_file)
-        blocks_info[block_file.stem] = display_name
+    names = {}
+    with os.scandir(block_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file():
+                stat = entry.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                cached = _block_display_name_cache.get(entry.path)
+                if cached is None or cached[0] != stamp:
+                    cached = (stamp, get_block_display_name(entry.path))
+                names[entry.path] = cached
+                blocks_info[entry.name[:-len('.json')]] = cached[1]
     
+    # 只保留本次仍存在的文件，已删除的文件不会留在缓存中
+    _block_display_name_cache.clear()
+    _block_display_name_cache.update(names)
     return blocks_info
 
 def select_blocks(config):
@@ -484,20 +803,17 @@ def select_blocks(config):
     print("-" * 50)
     
     use_color = config.getboolean('ui', 'colored_output', True)
+    # 颜色代码只取一次，禁用颜色时为空串，输出与不带颜色的版本一致
+    CYAN = Color.CYAN.value if use_color else ''
+    GREEN = Color.GREEN.value if use_color else ''
+    YELLOW = Color.YELLOW.value if use_color else ''
+    RESET = Color.RESET.value if use_color else ''
     
     for i, block in enumerate(available_blocks, 1):
-        chinese_name = blocks_info[block]
-        if use_color:
-            print(f"  {Color.CYAN.value}{i}. {block}{Color.RESET.value} ({chinese_name})")
-        else:
-            print(f"  {i}. {block} ({chinese_name})")
+        print(f"  {CYAN}{i}. {block}{RESET} ({blocks_info[block]})")
     
-    if use_color:
-        print(f"  {Color.GREEN.value}{len(available_blocks) + 1}. 全选{Color.RESET.value}")
-        print(f"  {Color.YELLOW.value}{len(available_blocks) + 2}. 取消全选{Color.RESET.value}")
-    else:
-        print(f"  {len(available_blocks) + 1}. 全选")
-        print(f"  {len(available_blocks) + 2}. 取消全选")
+    print(f"  {GREEN}{len(available_blocks) + 1}. 全选{RESET}")
+    print(f"  {YELLOW}{len(available_blocks) + 2}. 取消全选{RESET}")
     print("-" * 50)
     
     selected = set()
@@ -520,17 +836,11 @@ def select_blocks(config):
                         selected.add(available_blocks[idx-1])
                     elif idx == len(available_blocks) + 1:
                         selected = set(available_blocks)
-                        if use_color:
-                            print(f"{Color.GREEN.value}✅ 已全选所有方块{Color.RESET.value}")
-                        else:
-                            print(f"✅ 已全选所有方块")
+                        print(f"{GREEN}✅ 已全选所有方块{RESET}")
                         break
                     elif idx == len(available_blocks) + 2:
                         selected.clear()
-                        if use_color:
-                            print(f"{Color.YELLOW.value}✅ 已取消全选{Color.RESET.value}")
-                        else:
-                            print(f"✅ 已取消全选")
+                        print(f"{YELLOW}✅ 已取消全选{RESET}")
                         break
                     else:
                         print(f"❌ 无效的选择: {c}")
@@ -541,17 +851,8 @@ def select_blocks(config):
                         print(f"❌ 无效的方块类型: {c}")
             
             if selected:
-                selected_names = []
-                for block in sorted(selected):
-                    chinese_name = blocks_info[block]
-                    if use_color:
-                        selected_names.append(f"{Color.GREEN.value}{block}{Color.RESET.value}({chinese_name})")
-                    else:
-                        selected_names.append(f"{block}({chinese_name})")
-                if use_color:
-                    print(f"{Color.GREEN.value}✅ 已选择: {', '.join(selected_names)}{Color.RESET.value}")
-                else:
-                    print(f"✅ 已选择: {', '.join(selected_names)}")
+                selected_names = [f"{GREEN}{block}{RESET}({blocks_info[block]})" for block in sorted(selected)]
+                print(f"{GREEN}✅ 已选择: {', '.join(selected_names)}{RESET}")
                 break
                 
         except ValueError:
@@ -559,11 +860,30 @@ def select_blocks(config):
     
     return list(selected)
 
+def calculate_best_size(original_width, original_height, target_width, target_height):
+    """计算最佳保持比例的尺寸"""
+    orig_ratio = original_width / original_height
+    target_ratio = target_width / target_height
+    
+    if abs(orig_ratio - target_ratio) < 0.05:
+        return target_width, target_height
+    
+    if orig_ratio > target_ratio:
+        best_width = target_width
+        best_height = int(target_width / orig_ratio)
+    else:
+        best_height = target_height
+        best_width = int(target_height * orig_ratio)
+        
+    return best_width, best_height
+
 def get_user_input(config):
     """获取用户输入"""
     use_color = config.getboolean('ui', 'colored_output', True)
+    tags = COLOR_TAGS if use_color else PLAIN_TAGS
+    c, y, r = tags['c'], tags['y'], tags['r']
     
-    print(f"\n{'='*50}")
+    print(f"\n{DIVIDER}")
     
     # 选择输出格式
     print(f"\n📁 请选择输出文件格式:")
@@ -577,10 +897,7 @@ def get_user_input(config):
         print("3. .litematic (Litematica格式)")
     
     while True:
-        if use_color:
-            format_choice = input(f"{Color.CYAN.value}请选择格式 (1-3):{Color.RESET.value} ").strip()
-        else:
-            format_choice = input("请选择格式 (1-3): ").strip()
+        format_choice = input(f"{c}请选择格式 (1-3):{r} ").strip()
         if format_choice in ['1', '2', '3']:
             if format_choice == '1':
                 output_format = OutputFormat.SCHEMATIC
@@ -594,10 +911,7 @@ def get_user_input(config):
     
     # 获取输入文件路径
     while True:
-        if use_color:
-            input_path = input(f"\n{Color.CYAN.value}🖼️  请输入图片路径 (PNG或JPG):{Color.RESET.value} ").strip()
-        else:
-            input_path = input(f"\n🖼️  请输入图片路径 (PNG或JPG): ").strip()
+        input_path = input(f"\n{c}🖼️  请输入图片路径 (PNG或JPG):{r} ").strip()
         if not input_path:
             print(f"❌ 路径不能为空")
             continue
@@ -612,15 +926,11 @@ def get_user_input(config):
             continue
             
         try:
-            if ext == '.png':
-                with open(input_path, 'rb') as f:
-                    reader = png.Reader(file=f)
-                    width, height, _, _ = reader.read()
-            else:
-                img = Image.open(input_path)
-                width, height = img.size
+            # Image.open 只解析文件头取得尺寸，像素解码留给转换器完成
+            with Image.open(input_path) as img:
+                image_width, image_height = img.size
                 
-            if width == 0 or height == 0:
+            if image_width == 0 or image_height == 0:
                 print(f"❌ 请输入有效的尺寸格式，例如 64x64")
                 continue
             break
@@ -635,10 +945,7 @@ def get_user_input(config):
     output_dir.mkdir(exist_ok=True)
     
     default_name = Path(input_path).stem + f".{output_format.value}"
-    if use_color:
-        output_path = input(f"\n{Color.CYAN.value}💾 输出文件名 (回车使用 '{default_name}'):{Color.RESET.value} ").strip()
-    else:
-        output_path = input(f"\n💾 输出文件名 (回车使用 '{default_name}'): ").strip()
+    output_path = input(f"\n{c}💾 输出文件名 (回车使用 '{default_name}'):{r} ").strip()
     
     if not output_path:
         output_path = default_name
@@ -649,10 +956,7 @@ def get_user_input(config):
     
     # 获取生成尺寸
     while True:
-        if use_color:
-            size_input = input(f"\n{Color.CYAN.value}📐 请输入生成尺寸(格式: 宽x高，例如 64x64，留空则使用原图尺寸):{Color.RESET.value} ").strip()
-        else:
-            size_input = input(f"\n📐 请输入生成尺寸(格式: 宽x高，例如 64x64，留空则使用原图尺寸): ").strip()
+        size_input = input(f"\n{c}📐 请输入生成尺寸(格式: 宽x高，例如 64x64，留空则使用原图尺寸):{r} ").strip()
         if not size_input:
             width, height = None, None
             break
@@ -673,63 +977,146 @@ def get_user_input(config):
         except ValueError:
             print(f"❌ 请输入有效的尺寸格式，例如 64x64")
     
+    # 尺寸比例与原图不符时，在开始转换前询问是否使用建议尺寸
+    if width is not None and height is not None:
+        best_width, best_height = calculate_best_size(image_width, image_height, width, height)
+        if best_width != width or best_height != height:
+            print(f"\n{y}⚠️  建议使用保持比例的最佳尺寸: {best_width}x{best_height} (原图比例 {image_width}:{image_height}){r}")
+            choice = input("是否使用建议尺寸? (y/n): ").strip().lower()
+            if choice in YES_ANSWERS:
+                width, height = best_width, best_height
+    
     return input_path, str(output_file), width, height, selected_blocks, output_format
 
-def verify_schem_file(file_path, config):
-    """验证schem文件内容并修复可能的错误"""
+def load_schem_file(file_path):
+    """一次读入并解压整个 schem 文件后再解析 NBT"""
+    with open(file_path, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+        raw = gzip.decompress(f.read())
+    nbt_file = nbtlib.File.parse(io.BytesIO(raw))
+    nbt_file.filename = file_path
+    nbt_file.gzipped = True
+    return nbt_file
+
+def save_schem_file(nbt_file, file_path):
+    """先序列化到内存，再一次性写入 gzip 压缩的 schem 文件"""
+    buffer = io.BytesIO()
+    nbt_file.write(buffer)
+    with open(file_path, 'wb', buffering=FILE_BUFFER_SIZE) as raw_file:
+        with gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=1) as f:
+            f.write(buffer.getbuffer())
+
+def encode_varints(values):
+    """按 schem 规范将方块索引编码为 varint 字节 (每字节低 7 位存数据，最高位表示后面还有字节)"""
+    values = np.ascontiguousarray(values, dtype=np.uint32).ravel()
+    # 调色板不超过 128 种时每个索引正好一个字节，直接转换
+    if values.size == 0 or int(values.max()) < 0x80:
+        return values.astype(np.int8)
+    
+    # 每个索引所需的字节数及其在输出中的起始位置
+    lengths = np.ones(values.size, dtype=np.intp)
+    for threshold in (0x80, 0x4000, 0x200000, 0x10000000):
+        lengths += values >= threshold
+    starts = np.cumsum(lengths) - lengths
+    
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        chunk = ((values[mask] >> (7 * k)) & 0x7F).astype(np.uint8)
+        chunk[lengths[mask] > k + 1] |= 0x80
+        out[starts[mask] + k] = chunk
+    return out.view(np.int8)
+
+def decode_varints(data):
+    """解码 schem 的 varint 方块数据，返回方块ID数组；数据在某个 varint 中途结束或单个值过长时返回 None"""
+    data = np.ascontiguousarray(data, dtype=np.int8).ravel().view(np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    # 最高位为 0 的字节是每个 varint 的最后一个字节
+    ends = np.flatnonzero(data < 0x80)
+    if ends.size == data.size:
+        return data.astype(np.int64)
+    if ends.size == 0 or ends[-1] != data.size - 1:
+        return None
+    
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    if int(lengths.max()) > 5:
+        return None
+    
+    values = np.zeros(ends.size, dtype=np.int64)
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        values[mask] |= (data[starts[mask] + k] & 0x7F).astype(np.int64) << (7 * k)
+    return values
+
+def check_schem_data(nbt_file):
+    """检查已解析的schem数据，返回 (是否有效, 问题类型, 问题详情)"""
+    required_fields = ["Version", "DataVersion", "Width", "Height", "Length", "Palette", "BlockData"]
+    missing_fields = [field for field in required_fields if field not in nbt_file]
+    
+    if missing_fields:
+        return False, "文件结构不完整", f"文件缺少必要字段: {', '.join(missing_fields)}"
+    
+    width = nbt_file["Width"]
+    height = nbt_file["Height"]
+    length = nbt_file["Length"]
+    
+    if width <= 0 or height <= 0 or length <= 0:
+        return False, "尺寸数据无效", "文件尺寸数据无效"
+    
+    palette = nbt_file["Palette"]
+    if not palette:
+        return False, "调色板为空", "调色板为空"
+    
+    # BlockData 为 varint 编码，先解码为方块ID，长度检查和范围检查共用同一个数组
+    block_data = decode_varints(nbt_file["BlockData"])
+    expected_size = width * height * length
+    if block_data is None:
+        return False, "方块数据长度不匹配", "方块数据的 varint 编码不完整"
+    block_count = block_data.size
+    
+    if block_count != expected_size:
+        return False, "方块数据长度不匹配", f"方块数据长度不匹配: 期望 {expected_size}, 实际 {block_count}"
+    
+    palette_size = len(palette)
+    out_of_range_count = int(np.count_nonzero(block_data >= palette_size))
+    
+    if out_of_range_count:
+        return False, "方块ID超出调色板范围", f"发现 {out_of_range_count} 个超出调色板范围的方块ID"
+    
+    return True, "文件验证通过", None
+
+def verify_schem_file(file_path, config, nbt_file=None):
+    """验证schem文件内容并修复可能的错误；已解析过的文件可通过 nbt_file 传入，避免重复读取"""
     use_color = config.getboolean('ui', 'colored_output', True)
     
     print(f"\n🔍 正在验证生成的schem文件...")
     
     try:
-        nbt_file = nbtlib.load(file_path, gzipped=True)
-        
-        required_fields = ["Version", "DataVersion", "Width", "Height", "Length", "Palette", "BlockData"]
-        missing_fields = [field for field in required_fields if field not in nbt_file]
-        
-        if missing_fields:
-            print(f"❌ 文件缺少必要字段: {', '.join(missing_fields)}")
-            return False, "文件结构不完整"
-        
-        width = nbt_file["Width"]
-        height = nbt_file["Height"]
-        length = nbt_file["Length"]
+        if nbt_file is None:
+            nbt_file = load_schem_file(file_path)
+        is_valid, message, detail = check_schem_data(nbt_file)
         
-        if width <= 0 or height <= 0 or length <= 0:
-            print(f"❌ 文件尺寸数据无效")
-            return False, "尺寸数据无效"
-        
-        palette = nbt_file["Palette"]
-        if not palette:
-            print(f"❌ 调色板为空")
-            return False, "调色板为空"
-        
-        block_data = nbt_file["BlockData"]
-        expected_size = width * height * length
-        
-        if len(block_data) != expected_size:
-            print(f"❌ 方块数据长度不匹配: 期望 {expected_size}, 实际 {len(block_data)}")
-            return False, "方块数据长度不匹配"
-        
-        palette_size = len(palette)
-        out_of_range_blocks = [block_id for block_id in block_data if block_id >= palette_size]
-        
-        if out_of_range_blocks:
-            print(f"❌ 发现 {len(out_of_range_blocks)} 个超出调色板范围的方块ID")
-            return False, "方块ID超出调色板范围"
+        if not is_valid:
+            print(f"❌ {detail}")
+            return False, message
         
         if use_color:
             print(f"{Color.GREEN.value}✅ schem文件验证通过{Color.RESET.value}")
         else:
             print(f"✅ schem文件验证通过")
-        return True, "文件验证通过"
+        return True, message
         
     except Exception as e:
         print(f"❌ 验证过程中发生错误: {e}")
         return False, f"验证错误: {str(e)}"
 
-def fix_schem_file(file_path, issue, config):
-    """根据问题修复schem文件"""
+def fix_schem_file(file_path, issue, config, nbt_file=None):
+    """根据问题修复schem文件，返回 (是否成功, 修复说明, 备份路径, 修复后的数据是否通过检查)
+
+    nbt_file 为验证时已解析的数据，传入后会直接在其上修改。
+    """
     use_color = config.getboolean('ui', 'colored_output', True)
     
     if use_color:
@@ -738,7 +1125,9 @@ def fix_schem_file(file_path, issue, config):
         print(f"\n🔧 正在尝试修复schem文件: {issue}")
     
     try:
-        nbt_file = nbtlib.load(file_path, gzipped=True)
+        # 可直接修改验证时已解析的数据，省去再次读取文件
+        if nbt_file is None:
+            nbt_file = load_schem_file(file_path)
         
         fix_description = ""
         
@@ -748,20 +1137,23 @@ def fix_schem_file(file_path, issue, config):
             length = nbt_file["Length"]
             expected_size = width * height * length
             
-            new_block_data = nbtlib.ByteArray([0] * expected_size)
+            # 方块ID 0 的 varint 编码就是单个 0 字节，直接由 int8 零数组构建，不经过 Python 列表
+            new_block_data = nbtlib.ByteArray(np.zeros(expected_size, dtype=np.int8))
             nbt_file["BlockData"] = new_block_data
             
             fix_description = f"重置方块数据为默认值，长度: {expected_size}"
             
         elif "方块ID超出调色板范围" in issue:
             palette_size = len(nbt_file["Palette"])
-            block_data = nbt_file["BlockData"]
+            # 解码 varint 得到方块ID，把越界的置零后重新编码写回
+            block_data = decode_varints(nbt_file["BlockData"])
+            if block_data is None:
+                raise ValueError("方块数据的 varint 编码不完整，无法修复越界的方块ID")
             
-            fixed_blocks = 0
-            for i in range(len(block_data)):
-                if block_data[i] >= palette_size:
-                    block_data[i] = 0
-                    fixed_blocks += 1
+            out_of_range = block_data >= palette_size
+            fixed_blocks = int(np.count_nonzero(out_of_range))
+            block_data[out_of_range] = 0
+            nbt_file["BlockData"] = nbtlib.ByteArray(encode_varints(block_data))
             
             fix_description = f"修复了 {fixed_blocks} 个超出调色板范围的方块ID"
             
@@ -773,9 +1165,15 @@ def fix_schem_file(file_path, issue, config):
             
             fix_description = "添加了缺失的必要字段"
         
+        # 写出前直接检查修复后的内存数据，通过时调用方无需重新读取文件验证
+        try:
+            verified, _, _ = check_schem_data(nbt_file)
+        except Exception:
+            verified = False
+        
         backup_path = file_path.replace('.schem', '_backup.schem')
         os.rename(file_path, backup_path)
-        nbt_file.save(file_path, gzipped=True)
+        save_schem_file(nbt_file, file_path)
         
         if use_color:
             print(f"{Color.GREEN.value}✅ 文件修复完成: {fix_description}{Color.RESET.value}")
@@ -784,11 +1182,11 @@ def fix_schem_file(file_path, issue, config):
             print(f"✅ 文件修复完成: {fix_description}")
             print(f"📁 原始文件已备份为: {backup_path}")
         
-        return True, fix_description, backup_path
+        return True, fix_description, backup_path, verified
         
     except Exception as e:
         print(f"❌ 修复过程中发生错误: {e}")
-        return False, f"修复失败: {str(e)}", None
+        return False, f"修复失败: {str(e)}", None, False
 
 def ask_auto_verification(config):
     use_color = config.getboolean('ui', 'colored_output', True)
@@ -799,13 +1197,13 @@ def ask_auto_verification(config):
         else:
             choice = input(f"\n🔍 是否启用自动验证? (y/n, 回车默认为y): ").strip().lower()
         
-        if not choice or choice == 'y' or choice == 'yes':
+        if choice in YES_OR_DEFAULT_ANSWERS:
             if use_color:
                 print(f"{Color.GREEN.value}✅ 已启用自动验证{Color.RESET.value}")
             else:
                 print("✅ 已启用自动验证")
             return True
-        elif choice == 'n' or choice == 'no':
+        elif choice in NO_ANSWERS:
             if use_color:
                 print(f"{Color.YELLOW.value}⚠️  已禁用自动验证{Color.RESET.value}")
             else:
@@ -859,8 +1257,15 @@ def create_default_block_files():
     
     print(f"✅ 已创建默认方块映射文件")
 
+# 已成功加载的转换器模块，同一进程内再次转换时直接复用；需要重新加载插件时清空即可
+_converter_modules = {}
+
 def load_converter_module(converter_name):
     """动态加载转换器模块"""
+    cached = _converter_modules.get(converter_name)
+    if cached is not None:
+        return cached
+    
     format_dir = Path("Format")
     module_file = format_dir / f"{converter_name}.py"
     
@@ -868,98 +1273,158 @@ def load_converter_module(converter_name):
         print(f"❌ 找不到转换器模块: {module_file}")
         return None
     
-    # 动态导入模块
-    import importlib.util
-    spec = importlib.util.spec_from_file_location(converter_name, str(module_file))
-    module = importlib.util.module_from_spec(spec)
-    
+    # 按 Format.<格式> 的固定名称导入，Numba 磁盘缓存和 spawn 子进程都能按同一名称重新找到模块
+    import importlib
     try:
-        spec.loader.exec_module(module)
+        module = importlib.import_module(f"Format.{converter_name}")
+        _converter_modules[converter_name] = module
         return module
     except Exception as e:
         print(f"❌ 加载转换器模块失败: {e}")
         return None
 
+# 设置菜单的选项列表
+SETTINGS_MENU_TEMPLATE = (
+    "\n1. 查看当前配置\n"
+    "2. 修改输出目录\n"
+    "3. 切换控制台颜色 (当前: {color_state})\n"
+    "4. 修改语言设置 (当前: {language})\n"
+    "5. 重置为默认配置\n"
+    "6. 保存并退出\n"
+    "7. 不保存退出\n"
+    f"{'-'*30}\n"
+)
+
 def show_settings_menu(config):
     """显示设置菜单"""
     use_color = config.getboolean('ui', 'colored_output', True)
     
-    print("\n" + "="*50)
+    print("\n" + DIVIDER)
     if use_color:
         print(f"{Color.CYAN.value}⚙️  SunPixel 设置菜单{Color.RESET.value}")
     else:
         print("⚙️  SunPixel 设置菜单")
-    print("="*50)
+    print(DIVIDER)
     
-    while True:
-        print(f"\n1. 查看当前配置")
-        print(f"2. 修改输出目录")
-        print(f"3. 切换控制台颜色 (当前: {'启用' if use_color else '禁用'})")
-        print(f"4. 修改语言设置 (当前: {config.get('general', 'language', 'zh_CN')})")
-        print(f"5. 重置为默认配置")
-        print(f"6. 保存并退出")
-        print(f"7. 不保存退出")
-        print("-"*30)
-        
-        choice = input("请选择操作 (1-7): ").strip()
-        
-        if choice == "1":
-            print(f"\n📋 当前配置:")
-            print(f"   输出目录: {config.get('general', 'output_directory', 'output')}")
-            print(f"   控制台颜色: {'启用' if use_color else '禁用'}")
-            print(f"   语言设置: {config.get('general', 'language', 'zh_CN')}")
-            
-        elif choice == "2":
-            new_dir = input("请输入新的输出目录路径: ").strip()
-            if new_dir:
-                config.set('general', 'output_directory', new_dir)
-                print(f"✅ 输出目录已更新为: {new_dir}")
-                
-        elif choice == "3":
-            current = config.getboolean('ui', 'colored_output', True)
-            new_value = not current
-            config.set('ui', 'colored_output', new_value)
-            use_color = new_value
-            print(f"✅ 控制台颜色已{'启用' if new_value else '禁用'}")
+    # 菜单处理函数之间共享的状态
+    state = {'use_color': use_color, 'language': None, 'output_directory': None}
+    
+    def view_config():
+        print(f"\n📋 当前配置:")
+        print(f"   输出目录: {state['output_directory']}")
+        print(f"   控制台颜色: {'启用' if state['use_color'] else '禁用'}")
+        print(f"   语言设置: {state['language']}")
+    
+    def set_output_directory():
+        new_dir = input("请输入新的输出目录路径: ").strip()
+        if new_dir:
+            config.set('general', 'output_directory', new_dir)
+            print(f"✅ 输出目录已更新为: {new_dir}")
+    
+    def toggle_color():
+        new_value = not state['use_color']
+        config.set('ui', 'colored_output', new_value)
+        state['use_color'] = new_value
+        print(f"✅ 控制台颜色已{'启用' if new_value else '禁用'}")
+    
+    def set_language():
+        print(f"\n🗣️  选择语言:")
+        print(f"1. 中文 (zh_CN)")
+        # 可以在这里添加更多语言选项
+        lang_choice = input("请选择语言 (1): ").strip()
+        if lang_choice == "1":
+            config.set('general', 'language', 'zh_CN')
+            print("✅ 语言已设置为中文")
+        else:
+            print("⚠️  保持当前语言设置")
+    
+    def reset_config():
+        confirm = input("⚠️  确定要重置为默认配置吗? (y/n): ").strip().lower()
+        if confirm in YES_ANSWERS:
+            config.create_default()
+            config.load()
+            state['use_color'] = config.getboolean('ui', 'colored_output', True)
+            print("✅ 配置已重置为默认值")
+    
+    def save_and_exit():
+        config.save()
+        print("✅ 配置已保存")
+        print("👋 返回主程序...")
+        return True
+    
+    def exit_without_saving():
+        config.load()  # 重新加载配置，放弃更改
+        print("⚠️  更改未保存")
+        print("👋 返回主程序...")
+        return True
+    
+    # 菜单编号到处理函数的映射，返回 True 表示退出菜单
+    actions = {
+        "1": view_config,
+        "2": set_output_directory,
+        "3": toggle_color,
+        "4": set_language,
+        "5": reset_config,
+        "6": save_and_exit,
+        "7": exit_without_saving,
+    }
+    
+    try:
+        while True:
+            # 本轮菜单用到的配置值只读取一次
+            state['language'] = config.get('general', 'language', 'zh_CN')
+            state['output_directory'] = config.get('general', 'output_directory', 'output')
             
-        elif choice == "4":
-            print(f"\n🗣️  选择语言:")
-            print(f"1. 中文 (zh_CN)")
-            # 可以在这里添加更多语言选项
-            lang_choice = input("请选择语言 (1): ").strip()
-            if lang_choice == "1":
-                config.set('general', 'language', 'zh_CN')
-                print("✅ 语言已设置为中文")
-            else:
-                print("⚠️  保持当前语言设置")
-                
-        elif choice == "5":
-            confirm = input("⚠️  确定要重置为默认配置吗? (y/n): ").strip().lower()
-            if confirm == 'y' or confirm == 'yes':
-                config.create_default()
-                config.load()
-                use_color = config.getboolean('ui', 'colored_output', True)
-                print("✅ 配置已重置为默认值")
-                
-        elif choice == "6":
-            config.save()
-            print("✅ 配置已保存")
-            print("👋 返回主程序...")
-            break
+            # 整个菜单一次写入缓冲区，由下面的 input 提示统一刷新
+            sys.stdout.write(SETTINGS_MENU_TEMPLATE.format(
+                color_state='启用' if state['use_color'] else '禁用',
+                language=state['language']
+            ))
             
-        elif choice == "7":
-            config.load()  # 重新加载配置，放弃更改
-            print("⚠️  更改未保存")
-            print("👋 返回主程序...")
-            break
+            try:
+                choice = input("请选择操作 (1-7): ").strip()
+            except (KeyboardInterrupt, EOFError):
+                # 在菜单处中断视为不保存退出，放弃未保存的更改
+                print()
+                exit_without_saving()
+                break
             
-        else:
-            print("❌ 无效的选择，请重新输入")
+            action = actions.get(choice)
+            if action is None:
+                print("❌ 无效的选择，请重新输入")
+                continue
+            # 子菜单中按 Ctrl-C 只取消当前操作，回到设置菜单
+            try:
+                if action():
+                    break
+            except KeyboardInterrupt:
+                print()
+    finally:
+        # 离开设置菜单时立即写回仍未保存的修改，不必等到程序退出
+        config.flush()
+
+def print_conversion_stats(use_color, elapsed, width, height, block_count, output_path, block_names,
+                           fix_message=None, backup_path=None):
+    """一次写出转换完成 (传入 fix_message 时为修复完成) 后的统计信息"""
+    template = STATS_TEMPLATE if fix_message is None else FIX_STATS_TEMPLATE
+    tags = COLOR_TAGS if use_color else PLAIN_TAGS
+    sys.stdout.write(template.format(
+        **tags,
+        elapsed=elapsed,
+        width=width,
+        height=height,
+        block_count=block_count,
+        output_path=output_path,
+        block_names=block_names,
+        fix_message=fix_message,
+        backup_path=backup_path
+    ))
 
 def main():
     """主程序入口"""
-    # 检查命令行参数
-    if '--set' in sys.argv:
+    # 命令行参数只解析一次，之后的开关检查都是集合查找
+    cli_args = frozenset(sys.argv[1:])
+    if '--set' in cli_args:
         # 进入设置模式
         config = Config()
         show_settings_menu(config)
@@ -968,6 +1433,9 @@ def main():
     try:
         # 初始化配置
         config = Config()
+        # 颜色开关在整个流程中不会改变，只读取一次
+        use_color = config.getboolean('ui', 'colored_output', True)
+        tags = COLOR_TAGS if use_color else PLAIN_TAGS
         
         # 显示彩色logo
         display_logo(config)
@@ -982,18 +1450,11 @@ def main():
         input_image, output_schem, width, height, selected_blocks, output_format = get_user_input(config)
         
         # 根据选择的格式加载对应的转换器模块
-        if output_format == OutputFormat.SCHEMATIC:
-            converter_module = load_converter_module("schem")
-            format_name = "schem"
-        elif output_format == OutputFormat.RUNAWAY:
-            converter_module = load_converter_module("runaway")
-            format_name = "runaway"
-        elif output_format == OutputFormat.LITEMATICA:
-            converter_module = load_converter_module("litematic")
-            format_name = "litematic"
-        else:
+        if output_format not in CONVERTERS:
             print(f"❌ 不支持的输出格式")
             sys.exit(1)
+        format_name, class_name = CONVERTERS[output_format]
+        converter_module = load_converter_module(format_name)
         
         if converter_module is None:
             print(f"❌ 无法加载 {format_name} 转换器")
@@ -1003,28 +1464,7 @@ def main():
         start_time = time.time()
         
         # 执行转换并获取统计信息
-        converter_class = None
-        
-        # 尝试获取不同的类名
-        class_names = [
-            f"{format_name.capitalize()}Converter",
-            "Converter",
-            "schemConverter" if format_name == "schem" else None,
-            "LitematicaConverter" if format_name == "litematic" else None,
-            "RunawayConverter" if format_name == "runaway" else None
-        ]
-        
-        for class_name in class_names:
-            if class_name and hasattr(converter_module, class_name):
-                converter_class = getattr(converter_module, class_name)
-                break
-        
-        if converter_class is None:
-            # 如果找不到特定的类，尝试获取第一个类
-            for attr_name in dir(converter_module):
-                if not attr_name.startswith('__') and isinstance(getattr(converter_module, attr_name), type):
-                    converter_class = getattr(converter_module, attr_name)
-                    break
+        converter_class = getattr(converter_module, class_name, None)
         
         if converter_class is None:
             print(f"❌ 在转换器模块中找不到转换器类")
@@ -1036,83 +1476,48 @@ def main():
         if result is not None:
             schem_width, schem_height, block_count = result
             elapsed = time.time() - start_time
-            use_color = config.getboolean('ui', 'colored_output', True)
+            # 方块类型的显示名称只取一次，统计信息和修复结果共用
+            blocks_info = get_available_blocks()
+            g, r = tags['g'], tags['r']
+            selected_names_text = ', '.join(f"{g}{block}{r}({blocks_info.get(block, block)})" for block in selected_blocks)
+            abs_output = os.path.abspath(output_schem)
             
             # 显示转换统计信息
-            if use_color:
-                print(f"\n{Color.GREEN.value}✅ 转换成功完成! 耗时: {elapsed:.2f}秒{Color.RESET.value}")
-                print(f"{Color.CYAN.value}{'='*50}{Color.RESET.value}")
-                print(f"{Color.YELLOW.value}📐 生成结构尺寸: {schem_width} × {schem_height} 方块{Color.RESET.value}")
-                print(f"{Color.YELLOW.value}🧱 总方块数量: {block_count} 个{Color.RESET.value}")
-                print(f"{Color.YELLOW.value}💾 输出文件: {os.path.abspath(output_schem)}{Color.RESET.value}")
-                
-                # 显示使用的方块类型中文名
-                blocks_info = get_available_blocks()
-                selected_names = []
-                for block in selected_blocks:
-                    chinese_name = blocks_info.get(block, block)
-                    selected_names.append(f"{Color.GREEN.value}{block}{Color.RESET.value}({chinese_name})")
-                print(f"{Color.YELLOW.value}🎨 使用的方块类型: {', '.join(selected_names)}{Color.RESET.value}")
-                print(f"{Color.CYAN.value}{'='*50}{Color.RESET.value}")
-            else:
-                print(f"\n✅ 转换成功完成! 耗时: {elapsed:.2f}秒")
-                print(f"{'='*50}")
-                print(f"📐 生成结构尺寸: {schem_width} × {schem_height} 方块")
-                print(f"🧱 总方块数量: {block_count} 个")
-                print(f"💾 输出文件: {os.path.abspath(output_schem)}")
-                
-                # 显示使用的方块类型中文名
-                blocks_info = get_available_blocks()
-                selected_names = []
-                for block in selected_blocks:
-                    chinese_name = blocks_info.get(block, block)
-                    selected_names.append(f"{block}({chinese_name})")
-                print(f"🎨 使用的方块类型: {', '.join(selected_names)}")
-                print(f"{'='*50}")
+            print_conversion_stats(use_color, elapsed, schem_width, schem_height, block_count,
+                                   abs_output, selected_names_text)
             
             # 如果启用了自动验证，进行文件验证和修复
             if enable_verification and output_format == OutputFormat.SCHEMATIC:
-                is_valid, message = verify_schem_file(output_schem, config)
+                # 只读取并解析一次，验证和修复共用同一份数据；读取失败时交给 verify_schem_file 报告
+                try:
+                    schem_data = load_schem_file(output_schem)
+                except Exception:
+                    schem_data = None
+                is_valid, message = verify_schem_file(output_schem, config, nbt_file=schem_data)
                 
                 if not is_valid:
                     print(f"\n⚠️  文件验证发现问题: {message}")
                     
                     fix_choice = input(f"🔧 是否尝试自动修复? (y/n, 回车默认为y): ").strip().lower()
-                    if not fix_choice or fix_choice == 'y' or fix_choice == 'yes':
+                    if fix_choice in YES_OR_DEFAULT_ANSWERS:
                         fix_start_time = time.time()
-                        fix_success, fix_message, backup_path = fix_schem_file(output_schem, message, config)
+                        fix_success, fix_message, backup_path, fix_verified = fix_schem_file(output_schem, message, config, nbt_file=schem_data)
                         
                         if fix_success:
                             fix_elapsed = time.time() - fix_start_time
-                            if use_color:
-                                print(f"\n{Color.GREEN.value}✅ 自动验证并修复成功完成! 耗时: {fix_elapsed:.2f}秒{Color.RESET.value}")
-                                print(f"{Color.CYAN.value}{'='*50}{Color.RESET.value}")
-                                print(f"{Color.YELLOW.value}📐 生成结构尺寸: {schem_width} × {schem_height} 方块{Color.RESET.value}")
-                                print(f"{Color.YELLOW.value}🧱 总方块数量: {block_count} 个{Color.RESET.value}")
-                                print(f"{Color.CYAN.value}📁 原输出文件: {backup_path}{Color.RESET.value}")
-                                print(f"{Color.YELLOW.value}💾 输出文件: {os.path.abspath(output_schem)}{Color.RESET.value}")
-                                print(f"{Color.GREEN.value}🔧 修复内容: {fix_message}{Color.RESET.value}")
-                                print(f"{Color.YELLOW.value}🎨 使用的方块类型: {', '.join(selected_names)}{Color.RESET.value}")
-                                print(f"{Color.CYAN.value}{'='*50}{Color.RESET.value}")
-                            else:
-                                print(f"\n✅ 自动验证并修复成功完成! 耗时: {fix_elapsed:.2f}秒")
-                                print(f"{'='*50}")
-                                print(f"📐 生成结构尺寸: {schem_width} × {schem_height} 方块")
-                                print(f"🧱 总方块数量: {block_count} 个")
-                                print(f"📁 原输出文件: {backup_path}")
-                                print(f"💾 输出文件: {os.path.abspath(output_schem)}")
-                                print(f"🔧 修复内容: {fix_message}")
-                                print(f"🎨 使用的方块类型: {', '.join(selected_names)}")
-                                print(f"{'='*50}")
+                            print_conversion_stats(use_color, fix_elapsed, schem_width, schem_height, block_count,
+                                                   abs_output, selected_names_text,
+                                                   fix_message=fix_message, backup_path=backup_path)
                             
                             print(f"\n🔍 验证修复后的文件...")
-                            is_valid_after_fix, final_message = verify_schem_file(output_schem, config)
+                            # 修复时已检查过写出的数据，通过时不必再读取文件
+                            if fix_verified:
+                                is_valid_after_fix, final_message = True, "文件验证通过"
+                            else:
+                                is_valid_after_fix, final_message = verify_schem_file(output_schem, config)
                             
                             if is_valid_after_fix:
-                                if use_color:
-                                    print(f"{Color.GREEN.value}✅ 修复后文件验证通过{Color.RESET.value}")
-                                else:
-                                    print(f"✅ 修复后文件验证通过")
+                                print(f"{g}✅ 修复后文件验证通过{r}")
                             else:
                                 print(f"❌ 修复后文件仍然存在问题: {final_message}")
                         else:
@@ -1120,20 +1525,21 @@ def main():
                     else:
                         print(f"⚠️  用户选择不进行修复")
                 else:
-                    if use_color:
-                        print(f"{Color.GREEN.value}✅ 文件验证通过，无需修复{Color.RESET.value}")
-                    else:
-                        print(f"✅ 文件验证通过，无需修复")
+                    print(f"{g}✅ 文件验证通过，无需修复{r}")
             
         else:
             print(f"\n❌ 转换失败!")
             
     except Exception as e:
         print(f"\n❌ 发生错误: {e}")
-        import traceback
         traceback.print_exc()
     finally:
-        input(f"\n按Enter键退出...")
+        # 仅在交互终端中等待按键，脚本或管道调用、或传入 --no-pause 时直接退出
+        if sys.stdin.isatty() and '--no-pause' not in cli_args:
+            try:
+                input(f"\n按Enter键退出...")
+            except EOFError:
+                pass
 
 # 主程序入口
 if __name__ == "__main__":
@@ -1,12 +1,15 @@
 from flask import Flask, request, jsonify, render_template, send_file, Response
 import numpy as np
-import png
 from PIL import Image
 import nbtlib
 from nbtlib.tag import Byte, Short, Int, Long, Float, Double, String, List, Compound
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import gzip
 import math
 import json
+import re
 from pathlib import Path
 import tempfile
 import io
@@ -21,6 +24,37 @@ import mimetypes
 from werkzeug.utils import safe_join
 import subprocess
 import sys
+import contextlib
+
+# 与命令行版共用 Numba 内核和编码函数，内核以 Format._common 的固定模块名缓存到磁盘，
+# 直接运行本文件时也能从缓存加载，而不是每次启动都重新编译
+from Format._common import (
+    NUMBA_AVAILABLE, LUT_EMPTY, CLOSEST_CACHE_SIZE, PALETTE_CACHE_SIZE, COMMENT_LINE_RE,
+    encode_varints, pack_block_states,
+)
+if NUMBA_AVAILABLE:
+    import numba
+    from numba import set_num_threads
+    from Format._common import _quantize_image_kernel, _fill_lut_kernel
+
+
+def _select_threading_layer():
+    """选择线程安全的 Numba 线程层，返回是否可以从多个线程同时启动并行内核"""
+    # 默认的 workqueue 线程层在多个线程同时启动并行内核时会中止整个进程，
+    # 转换任务在线程池中并发运行，需在第一次启动内核前换成 tbb 或 omp
+    import importlib
+    for layer in ('tbb', 'omp'):
+        try:
+            importlib.import_module(f"numba.np.ufunc.{layer}pool")
+        except Exception:
+            continue
+        numba.config.THREADING_LAYER = layer
+        return True
+    return False
+
+NUMBA_THREADSAFE = NUMBA_AVAILABLE and _select_threading_layer()
+# 没有线程安全的线程层时，同一时刻只允许一个线程启动并行内核
+numba_kernel_lock = contextlib.nullcontext() if NUMBA_THREADSAFE else threading.Lock()
 
 app = Flask(__name__)
 
@@ -28,8 +62,18 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 存储转换结果
-conversion_results = {}
+# 存储转换结果，按创建顺序排列，所有增删都在 conversion_lock 下进行
+conversion_results = OrderedDict()
+conversion_lock = threading.Lock()
+# 最多保留的任务数，超出后淘汰最早的已结束任务
+MAX_CONVERSION_TASKS = 64
+# 后台清理过期任务和临时文件的间隔（秒）
+CLEANUP_INTERVAL = 60
+# 转换任务线程池，限制同时进行的转换数量，超出的任务排队等待
+conversion_executor = ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 1), thread_name_prefix="convert")
+# 正在进行的转换数，用于在并发任务间平分 Numba 线程，避免线程数超过 CPU 核数
+active_conversions = 0
+active_conversions_lock = threading.Lock()
 
 # 临时文件存储目录
 TEMP_DIR = Path("temp_downloads")
@@ -95,9 +139,9 @@ class ConversionProgress:
         self.filename = filename
         
     def reset(self):
+        """清空进度和日志；is_running 保持不变，避免排队中的任务在重置瞬间被容量淘汰"""
         self.progress = 0
         self.message = ""
-        self.is_running = False
         self.current_stage = ""
         self.logs = []
         self.file_path = None
@@ -105,6 +149,11 @@ class ConversionProgress:
         self.download_count = 0
 
 class WebImageToStructure:
+    # 进程内按方块映射内容缓存调色板数组和查找表，相同方块组合的请求共用同一份
+    _palette_cache = {}
+    # 已解析的方块映射文件，按路径和修改时间缓存，请求之间不必重复读取
+    _block_file_cache = {}
+    
     def __init__(self, progress_manager, config):
         self.color_to_block = {}
         self.block_palette = []
@@ -125,17 +174,38 @@ class WebImageToStructure:
         self.progress.update(progress_value, message, stage)
         self.log(message)
         
+    def read_block_file(self, block_file):
+        """读取单个方块映射文件，按文件修改时间缓存解析结果；没有有效内容时返回 None"""
+        cache_key = str(block_file.resolve())
+        mtime = block_file.stat().st_mtime_ns
+        cached = type(self)._block_file_cache.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with open(block_file, 'r', encoding='utf-8') as f:
+            content = COMMENT_LINE_RE.sub('', f.read())
+        
+        block_pairs = None
+        if content.strip():
+            # 按顺序保留全部条目，与命令行转换器相同，颜色重复时由 build_palette_arrays 统一取第一条
+            block_pairs = json.loads(content, object_pairs_hook=list)
+        
+        type(self)._block_file_cache[cache_key] = (mtime, block_pairs)
+        return block_pairs
+        
     def load_block_mappings(self, selected_blocks):
         """从block目录加载选中的方块映射"""
         self.update_progress(10, "🔄 正在加载方块映射...", "加载方块映射")
         self.color_to_block = {}
+        self._color_entries = []
         block_dir = Path("block")
         
         if not block_dir.exists():
             self.log("❌ 错误: block目录不存在!")
             return False
             
-        block_files = list(block_dir.glob("*.json"))
+        # 按文件名排序加载，颜色重复时保留哪个方块与命令行转换器一致
+        block_files = sorted(block_dir.glob("*.json"))
         total_files = len(block_files)
         loaded_files = 0
         
@@ -143,26 +213,14 @@ class WebImageToStructure:
             block_name = block_file.stem
             if block_name in selected_blocks:
                 try:
-                    with open(block_file, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        json_lines = []
-                        for line in lines:
-                            if not line.strip().startswith('#'):
-                                json_lines.append(line)
-                        
-                        if json_lines:
-                            block_data = json.loads(''.join(json_lines))
-                            processed_block_data = {}
-                            for color_key, block_info in block_data.items():
-                                if isinstance(color_key, str):
-                                    processed_block_data[color_key] = block_info
-                                else:
-                                    processed_block_data[str(color_key)] = block_info
-                            
-                            self.color_to_block.update(processed_block_data)
-                            self.log(f"✅ 已加载: {block_name}")
-                        else:
-                            self.log(f"❌ 文件 {block_file} 中没有有效的JSON内容")
+                    block_pairs = self.read_block_file(block_file)
+                    if block_pairs is not None:
+                        for color_key, block_info in block_pairs:
+                            self._color_entries.append((color_key, block_info))
+                            self.color_to_block[color_key] = block_info
+                        self.log(f"✅ 已加载: {block_name}")
+                    else:
+                        self.log(f"❌ 文件 {block_file} 中没有有效的JSON内容")
                 except Exception as e:
                     self.log(f"❌ 加载 {block_file} 时出错: {e}")
             
@@ -174,85 +232,165 @@ class WebImageToStructure:
             self.log("❌ 错误: 没有加载任何方块映射!")
             return False
             
-        self.log(f"✅ 总共加载 {len(self.color_to_block)} 种颜色映射")
+        self.build_palette_arrays()
+        
+        skipped = len(self._color_entries) - len(self._palette_names)
+        if skipped > 0:
+            self.log(f"⚠️ {skipped} 条映射的颜色与前面的重复或无法解析，不会被匹配到，已忽略")
+        self.log(f"✅ 总共加载 {len(self._palette_names)} 种颜色映射")
         return True
         
-    def color_distance(self, c1, c2):
-        """计算两个颜色之间的感知距离"""
-        r1, g1, b1 = c1
-        r2, g2, b2 = c2
-        r_mean = (r1 + r2) / 2
+    def _color_distance_sq(self, c1, c2):
+        """计算两个颜色之间的感知距离 (整数运算，返回平方距离)"""
+        r1, g1, b1 = (int(v) for v in c1)
+        r2, g2, b2 = (int(v) for v in c2)
+        # redmean 权重整体乘以 512 后全部为整数，省略开方不影响大小比较
+        r_sum = r1 + r2
         
         r_diff = r1 - r2
         g_diff = g1 - g2
         b_diff = b1 - b2
         
-        return math.sqrt(
-            (2 + r_mean/256) * (r_diff**2) +
-            4 * (g_diff**2) +
-            (2 + (255 - r_mean)/256) * (b_diff**2)
+        return (
+            (1024 + r_sum) * r_diff * r_diff +
+            2048 * g_diff * g_diff +
+            (1534 - r_sum) * b_diff * b_diff
         )
         
     def find_closest_color(self, color):
-        """找到最接近的颜色映射"""
-        r, g, b = color[:3]
-        closest_color = None
-        min_distance = float('inf')
-        
-        for target_color_str in self.color_to_block:
+        """找到最接近的颜色映射，按打包后的 RGB 缓存结果，相同颜色只计算一次"""
+        r, g, b = (int(v) for v in color[:3])
+        key = (r << 16) | (g << 8) | b
+        result = self._closest_cache.get(key)
+        if result is None:
+            row = self.nearest_palette_rows(np.array([[r, g, b]], dtype=np.int16))[0]
+            result = self._palette_names[row], int(self._palette_values[row])
+            if len(self._closest_cache) >= CLOSEST_CACHE_SIZE:
+                self._closest_cache.clear()
+            self._closest_cache[key] = result
+        return result
+    
+    def build_palette_arrays(self):
+        """一次性解析所有颜色键，生成向量化匹配用的调色板数组"""
+        self._closest_cache = {}
+        # 方块信息转为 repr 字符串后整个键可哈希，比逐条 json 序列化更省
+        cache_key = tuple((color_key, repr(block_info)) for color_key, block_info in self._color_entries)
+        cached = type(self)._palette_cache.get(cache_key)
+        if cached is not None:
+            (self._palette_names, self._palette_rgb, self._palette_values,
+             self._lut, self.block_palette, self._palette_block_idx) = cached
+            return
+        
+        colors = []
+        self._palette_names = []
+        values = []
+        
+        for target_color_str, block_info in self._color_entries:
             try:
                 if target_color_str.startswith('(') and target_color_str.endswith(')'):
-                    color_str = target_color_str[1:-1]
-                    color_values = [int(x.strip()) for x in color_str.split(',')]
-                    target_color = tuple(color_values[:3])
-                else:
-                    color_values = [int(x.strip()) for x in target_color_str.split(',')]
-                    target_color = tuple(color_values[:3])
-                
-                distance = self.color_distance((r, g, b), target_color)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_color = target_color_str
-            except Exception:
+                    target_color_str = target_color_str[1:-1]
+                color_values = [int(x.strip()) for x in target_color_str.split(',')]
+            except ValueError:
                 continue
-                
-        if closest_color:
-            block_info = self.color_to_block[closest_color]
+            if len(color_values) < 3:
+                continue
+            
             if isinstance(block_info, list) and len(block_info) >= 2:
-                return block_info[0], block_info[1]
+                block_name, block_data = block_info[0], block_info[1]
             else:
-                return "minecraft:white_concrete", 0
-        else:
-            return "minecraft:white_concrete", 0
+                block_name, block_data = "minecraft:white_concrete", 0
+            
+            colors.append(color_values[:3])
+            self._palette_names.append(block_name)
+            values.append(block_data)
+        
+        if not colors:
+            colors.append([255, 255, 255])
+            self._palette_names.append("minecraft:white_concrete")
+            values.append(0)
+        
+        self._palette_rgb = np.array(colors, dtype=np.int16)
+        self._palette_values = np.array(values, dtype=np.int16)
+        
+        # 颜色相同的条目中只有第一条可能被匹配到，其余的不进入调色板
+        _, first_rows = np.unique(self._palette_rgb, axis=0, return_index=True)
+        if first_rows.size < len(self._palette_names):
+            keep = np.sort(first_rows)
+            self._palette_names = [self._palette_names[i] for i in keep]
+            self._palette_rgb = self._palette_rgb[keep]
+            self._palette_values = self._palette_values[keep]
+        self.build_color_lut()
+        
+        # 按首次出现顺序去重得到方块调色板，保证每次生成的调色板顺序一致
+        self.block_palette = list(dict.fromkeys(self._palette_names))
+        block_index = {name: idx for idx, name in enumerate(self.block_palette)}
+        self._palette_block_idx = np.array([block_index[name] for name in self._palette_names], dtype=np.uint16)
+        
+        # 查找表按需填充，缓存的是同一个数组，后续请求会沿用已经算好的格子
+        if len(type(self)._palette_cache) >= PALETTE_CACHE_SIZE:
+            type(self)._palette_cache.clear()
+        type(self)._palette_cache[cache_key] = (
+            self._palette_names, self._palette_rgb, self._palette_values,
+            self._lut, self.block_palette, self._palette_block_idx
+        )
+        
+    def build_color_lut(self):
+        """创建 5-5-5 量化 RGB 到调色板行号的查找表 (32×32×32)，按需填充"""
+        self._lut = np.full((32, 32, 32), LUT_EMPTY, dtype=np.uint16)
+        
+    def fill_color_lut(self, keys):
+        """只为图片中实际出现且尚未计算的量化键求最近调色板行号"""
+        lut_flat = self._lut.reshape(-1)
+        present = np.zeros(lut_flat.size, dtype=bool)
+        present[keys.ravel()] = True
+        missing = np.flatnonzero(present & (lut_flat == LUT_EMPTY))
+        
+        if NUMBA_AVAILABLE:
+            with numba_kernel_lock:
+                _fill_lut_kernel(missing, self._palette_rgb, lut_flat)
+            return
+        
+        # 每个量化格取中心颜色参与匹配，分批计算以限制临时数组大小
+        for start in range(0, missing.size, 1024):
+            batch = missing[start:start + 1024]
+            colors = np.stack([batch >> 10, (batch >> 5) & 31, batch & 31], axis=1) * 8 + 4
+            lut_flat[batch] = self.nearest_palette_rows(colors)
+        
+    def nearest_palette_rows(self, colors):
+        """对 (N, 3) 颜色数组整体求最接近的调色板行号"""
+        # 按通道转置为连续的 (3, N) / (3, K) 数组，广播时每个通道都是顺序访问
+        r, g, b = np.ascontiguousarray(colors.T, dtype=np.int32)[:, :, None]
+        pr, pg, pb = np.ascontiguousarray(self._palette_rgb.T, dtype=np.int32)[:, None, :]
+        
+        # 逐通道计算 (N, K) 的差值，不生成 (N, K, 3) 的临时数组
+        r_sum = r + pr
+        r_diff = r - pr
+        g_diff = g - pg
+        b_diff = b - pb
+        
+        # 与 _color_distance_sq 相同的整数权重，最大值约 3 亿，int32 不会溢出
+        distance = (1024 + r_sum) * (r_diff * r_diff)
+        distance += 2048 * (g_diff * g_diff)
+        distance += (1534 - r_sum) * (b_diff * b_diff)
+        return np.argmin(distance, axis=1)
     
-    def load_image_from_bytes(self, image_bytes, ext):
-        """从字节数据加载图片"""
+    def load_image_from_bytes(self, image_bytes, ext, target_size=None):
+        """从字节数据加载图片，target_size 为目标方块尺寸 (宽, 高)，用于 JPEG 缩小解码"""
         self.update_progress(35, "🖼️ 正在加载图片...", "加载图片")
-        if ext.lower() == '.png':
-            reader = png.Reader(bytes=image_bytes)
-            width, height, pixels, metadata = reader.asDirect()
-            
-            image_data = []
-            for row in pixels:
-                image_data.append(row)
-            
-            if metadata['alpha']:
-                self.pixels = np.array(image_data, dtype=np.uint8).reshape(height, width, 4)[:, :, :3]
-            else:
-                self.pixels = np.array(image_data, dtype=np.uint8).reshape(height, width, 3)
-                
-            self.original_width = width
-            self.original_height = height
-            
-        elif ext.lower() in ('.jpg', '.jpeg'):
-            img = Image.open(io.BytesIO(image_bytes))
-            img = img.convert('RGB')
-            self.original_width, self.original_height = img.size
-            self.pixels = np.array(img)
-            
-        else:
+        if ext.lower() not in ('.png', '.jpg', '.jpeg'):
             raise ValueError(f"不支持的图片格式: {ext}")
         
+        # PNG 和 JPG 统一交给 Pillow 在 C 层解码，透明通道直接丢弃
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            # JPEG 可直接按 1/2、1/4、1/8 缩小解码，保留至少两倍于目标尺寸的像素供区域平均
+            if target_size is not None and img.format == 'JPEG':
+                img.draft('RGB', (target_size[0] * 2, target_size[1] * 2))
+            # 已是 RGB 时直接取数组，省去 convert 产生的整图拷贝
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            self.pixels = np.asarray(img)
+        self.original_height, self.original_width = self.pixels.shape[:2]
+        
         self.log(f"✅ 图片加载完成: {self.original_width} × {self.original_height} 像素")
         self.update_progress(40, f"✅ 图片加载完成: {self.original_width} × {self.original_height} 像素")
             
@@ -262,59 +400,61 @@ class WebImageToStructure:
         self.height = max(1, height)
         self.log(f"📐 设置生成尺寸: {self.width} × {self.height} 方块")
             
+    def downsample_pixels(self):
+        """按目标尺寸对原图做区域平均，一次性得到 (高, 宽, 3) 的平均颜色"""
+        # 每个方块对应的源区域起点，与逐像素切片时的 int(y * scale_y) 一致
+        row_starts = (np.arange(self.height) * (self.original_height / self.height)).astype(np.intp)
+        col_starts = (np.arange(self.width) * (self.original_width / self.width)).astype(np.intp)
+        
+        # 放大时区域可能为空，此时取起点处的单个像素
+        row_counts = np.maximum(np.diff(np.append(row_starts, self.original_height)), 1)
+        col_counts = np.maximum(np.diff(np.append(col_starts, self.original_width)), 1)
+        
+        sums = np.add.reduceat(self.pixels, row_starts, axis=0, dtype=np.uint32)
+        sums = np.add.reduceat(sums, col_starts, axis=1, dtype=np.uint32)
+        
+        areas = (row_counts[:, None] * col_counts[None, :]).astype(np.uint32)
+        return (sums // areas[:, :, None]).astype(np.uint8)
+            
+    def map_pixels_to_rows(self):
+        """将原图映射为 (高, 宽) 的调色板行号，优先使用 Numba 融合内核"""
+        if NUMBA_AVAILABLE:
+            row_starts = (np.arange(self.height) * (self.original_height / self.height)).astype(np.intp)
+            col_starts = (np.arange(self.width) * (self.original_width / self.width)).astype(np.intp)
+            keys = np.empty((self.height, self.width), dtype=np.uint16)
+            with numba_kernel_lock:
+                _quantize_image_kernel(np.ascontiguousarray(self.pixels), row_starts, col_starts,
+                                       self.original_height, self.original_width, keys)
+        else:
+            # 平均颜色量化为 5-5-5 键，经查找表一次取得每个方块对应的调色板行号
+            q = (self.downsample_pixels() >> 3).astype(np.uint16)
+            keys = (q[:, :, 0] << 10) | (q[:, :, 1] << 5) | q[:, :, 2]
+        
+        self.fill_color_lut(keys)
+        return self._lut.reshape(-1)[keys]
+            
     def generate_structure(self, format_type):
         """生成结构数据"""
         self.update_progress(45, f"🔨 正在生成{format_type.upper()}结构数据...", "生成结构")
         
-        # 初始化方块调色板
-        self.block_palette = list(set([block[0] for block in self.color_to_block.values()]))
+        # 方块调色板已在 build_palette_arrays 中按首次出现顺序去重生成
         self.log(f"🎨 初始化调色板: {len(self.block_palette)} 种方块")
         self.update_progress(50, f"🎨 初始化调色板: {len(self.block_palette)} 种方块")
         
-        # 创建方块数据数组
-        self.block_data = np.zeros((self.depth, self.height, self.width), dtype=int)
-        self.block_data_values = np.zeros((self.depth, self.height, self.width), dtype=int)
-        
-        # 计算缩放比例
-        scale_x = self.original_width / self.width
-        scale_y = self.original_height / self.height
+        # 创建方块数据数组，调色板索引用 uint16、方块数据值用 int16 即可容纳
+        self.block_data = np.zeros((self.depth, self.height, self.width), dtype=np.uint16)
+        self.block_data_values = np.zeros((self.depth, self.height, self.width), dtype=np.int16)
         
         self.update_progress(55, "🔄 正在处理像素数据...", "处理像素")
         total_pixels = self.width * self.height
-        processed_pixels = 0
         
-        # 填充方块数据
-        for y in range(self.height):
-            for x in range(self.width):
-                src_x = int(x * scale_x)
-                src_y = int(y * scale_y)
-                
-                region = self.pixels[
-                    int(src_y):min(int((y+1)*scale_y), self.original_height),
-                    int(src_x):min(int((x+1)*scale_x), self.original_width)
-                ]
-                if region.size == 0:
-                    avg_color = (255, 255, 255)
-                else:
-                    avg_color = tuple(np.mean(region, axis=(0, 1)).astype(int))
-                
-                block_name, block_data = self.find_closest_color(avg_color)
-                if block_name in self.block_palette:
-                    block_index = self.block_palette.index(block_name)
-                else:
-                    block_index = 0
-                
-                self.block_data[0, y, x] = block_index
-                self.block_data_values[0, y, x] = block_data
-                
-                processed_pixels += 1
-                if processed_pixels % 100 == 0 or processed_pixels == total_pixels:
-                    progress_percent = 55 + (processed_pixels / total_pixels) * 35
-                    progress_pct = processed_pixels/total_pixels*100
-                    self.update_progress(
-                        progress_percent, 
-                        f"📊 处理像素: {processed_pixels}/{total_pixels} ({progress_pct:.1f}%)"
-                    )
+        rows = self.map_pixels_to_rows()
+        
+        # 两张表共用同一组调色板行号，clip 模式下 np.take 直接写入目标数组，不产生临时数组
+        np.take(self._palette_block_idx, rows, out=self.block_data[0], mode='clip')
+        np.take(self._palette_values, rows, out=self.block_data_values[0], mode='clip')
+        
+        self.update_progress(90, f"📊 处理像素: {total_pixels}/{total_pixels} (100.0%)")
         
         self.log(f"✅ {format_type.upper()}数据结构生成完成")
         self.update_progress(90, f"✅ {format_type.upper()}数据结构生成完成")
@@ -351,9 +491,7 @@ class WebImageToStructure:
             }),
             
             # 方块数据
-            "BlockData": nbtlib.ByteArray(
-                self.block_data.flatten(order='C').tolist()
-            ),
+            "BlockData": nbtlib.ByteArray(encode_varints(self.block_data)),
             
             # 方块实体数据
             "BlockEntities": List[Compound]([])
@@ -364,15 +502,19 @@ class WebImageToStructure:
         filepath = TEMP_DIR / filename
         
         nbt_file = nbtlib.File(schematic)
-        nbt_file.save(str(filepath), gzipped=True)
+        # 先序列化到内存再一次性写入低压缩级别的 gzip，体积几乎不变但速度快得多
+        buffer = io.BytesIO()
+        nbt_file.write(buffer)
+        with gzip.open(filepath, 'wb', compresslevel=1) as f:
+            f.write(buffer.getbuffer())
         
         self.log("✅ schem文件保存完成")
         self.update_progress(95, "✅ schem文件保存完成")
         return filepath, filename
         
     def _save_json_file(self, filename_base):
-        """保存JSON文件（RunAway格式）"""
-        # 创建JSON结构数据
+        """保存JSON文件（RunAway格式），方块逐行流式写出，不在内存中构建完整列表"""
+        # 创建JSON结构数据，blocks 放在最后单独写出
         json_data = {
             "name": filename_base,
             "author": "SunPixel",
@@ -381,74 +523,88 @@ class WebImageToStructure:
                 "width": int(self.width),  # 转换为Python int
                 "height": int(self.depth),
                 "length": int(self.height)
-            },
-            "blocks": []
+            }
         }
+        header = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
         
-        # 添加方块数据
-        for y in range(self.height):
-            for x in range(self.width):
-                block_index = int(self.block_data[0, y, x])  # 转换为Python int
-                if block_index < len(self.block_palette):
-                    block_name = self.block_palette[block_index]
-                    block_data = int(self.block_data_values[0, y, x])  # 转换为Python int
-                    
-                    json_data["blocks"].append({
-                        "x": int(x),
-                        "y": 0,
-                        "z": int(y),
-                        "block": block_name,
-                        "data": block_data
-                    })
+        # 方块名只编码一次，逐行按调色板索引取用
+        block_names = [json.dumps(name, ensure_ascii=False) for name in self.block_palette]
+        block_rows = self.block_data[0].tolist()
+        value_rows = self.block_data_values[0].tolist()
         
         # 保存到临时文件
         filename = f"{filename_base}.json"
         filepath = TEMP_DIR / filename
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+            # 去掉结尾的 } 后接上 blocks 数组
+            f.write(header[:-1])
+            f.write(',"blocks":[')
+            for z, (block_row, value_row) in enumerate(zip(block_rows, value_rows)):
+                if z:
+                    f.write(',\n')
+                f.write(',\n'.join(
+                    f'{{"x":{x},"y":0,"z":{z},"block":{block_names[block_index]},"data":{value}}}'
+                    for x, (block_index, value) in enumerate(zip(block_row, value_row))
+                ))
+            f.write(']}')
         
         self.log("✅ JSON文件保存完成")
         self.update_progress(95, "✅ JSON文件保存完成")
         return filepath, filename
         
     def _save_litematic_file(self, filename_base):
-        """保存litematic文件"""
-        # 创建Litematica的简化版本
-        # 注意：这是简化的实现，完整实现需要更多数据结构
-        
-        litematic_data = {
-            "Version": 5,
-            "Metadata": {
-                "EnclosingSize": {
-                    "x": int(self.width),  # 转换为Python int
-                    "y": int(self.depth),
-                    "z": int(self.height)
-                },
-                "Name": filename_base,
-                "Author": "SunPixel",
-                "Description": f"Generated by SunPixel from image",
-                "RegionCount": 1
-            },
-            "Regions": {
-                "structure": {
-                    "Position": {"x": 0, "y": 0, "z": 0},
-                    "Size": {"x": int(self.width), "y": int(self.depth), "z": int(self.height)},  # 转换为Python int
-                    "BlockStatePalette": [
-                        {"Name": block_name, "Properties": {}} 
+        """保存litematic文件（Litematica v5 NBT 格式，BlockStates 为紧密打包的 Long 数组）"""
+        now = Long(int(time.time() * 1000))
+        total_blocks = self.width * self.height * self.depth
+        
+        # 每个条目至少 4 位，与命令行版本的 Litematica 转换器一致
+        bits_per_entry = max((len(self.block_palette) - 1).bit_length(), 4)
+        block_states = pack_block_states(self.block_data[0], bits_per_entry)
+        
+        litematic_data = Compound({
+            "Version": Int(5),
+            "MinecraftDataVersion": Int(3100),
+            "Metadata": Compound({
+                "Author": String("SunPixel"),
+                "Description": String("Generated by SunPixel from image"),
+                "Name": String(filename_base),
+                "EnclosingSize": Compound({
+                    "x": Int(self.width),
+                    "y": Int(self.depth),
+                    "z": Int(self.height)
+                }),
+                "RegionCount": Int(1),
+                "TimeCreated": now,
+                "TimeModified": now,
+                "TotalBlocks": Int(total_blocks),
+                "TotalVolume": Int(total_blocks)
+            }),
+            "Regions": Compound({
+                "region_0": Compound({
+                    "Position": Compound({"x": Int(0), "y": Int(0), "z": Int(0)}),
+                    "Size": Compound({"x": Int(self.width), "y": Int(self.depth), "z": Int(self.height)}),
+                    "BlockStatePalette": List[Compound]([
+                        Compound({"Name": String(block_name)})
                         for block_name in self.block_palette
-                    ],
-                    "BlockStates": self.block_data.flatten(order='C').astype(int).tolist()  # 转换为Python list
-                }
-            }
-        }
+                    ]),
+                    "BlockStates": nbtlib.LongArray(block_states),
+                    "BitsPerEntry": Int(bits_per_entry),
+                    "TileEntities": List[Compound]([])
+                })
+            })
+        })
         
         # 保存到临时文件
         filename = f"{filename_base}.litematic"
         filepath = TEMP_DIR / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(litematic_data, f, indent=2, ensure_ascii=False)
+        nbt_file = nbtlib.File(litematic_data)
+        # 先序列化到内存再一次性写入低压缩级别的 gzip
+        buffer = io.BytesIO()
+        nbt_file.write(buffer)
+        with gzip.open(filepath, 'wb', compresslevel=1) as f:
+            f.write(buffer.getbuffer())
         
         self.log("✅ litematic文件保存完成")
         self.update_progress(95, "✅ litematic文件保存完成")
@@ -467,7 +623,8 @@ class WebImageToStructure:
             return False
             
         try:
-            self.load_image_from_bytes(image_bytes, ext)
+            target_size = None if width is None or height is None else (max(1, width), max(1, height))
+            self.load_image_from_bytes(image_bytes, ext, target_size)
             
             if width is None or height is None:
                 self.set_size(self.original_width, self.original_height)
@@ -502,19 +659,25 @@ class WebImageToStructure:
             self.progress.is_running = False
             return False
 
+# 可用方块类型缓存：(block 目录修改时间, 方块类型列表)
+_available_blocks_cache = None
+
 def get_available_blocks():
-    """获取可用的方块类型"""
+    """获取可用的方块类型，block 目录未变化时直接返回缓存结果"""
+    global _available_blocks_cache
     block_dir = Path("block")
     if not block_dir.exists():
         # 创建默认方块文件
         block_dir.mkdir(exist_ok=True)
         create_default_block_files()
     
-    blocks = []
-    for block_file in block_dir.glob("*.json"):
-        blocks.append(block_file.stem)
+    # 目录中增删或重命名文件都会更新目录的修改时间
+    mtime = block_dir.stat().st_mtime_ns
+    if _available_blocks_cache is None or _available_blocks_cache[0] != mtime:
+        blocks = [block_file.stem for block_file in block_dir.glob("*.json")]
+        _available_blocks_cache = (mtime, blocks)
     
-    return blocks
+    return list(_available_blocks_cache[1])
 
 def create_default_block_files():
     """创建默认的方块映射文件"""
@@ -581,11 +744,49 @@ def create_default_block_files():
     with open(block_dir / "concrete.json", 'w', encoding='utf-8') as f:
         json.dump(concrete_mapping, f, indent=2, ensure_ascii=False)
 
+def register_task(task_id, progress_manager):
+    """登记新任务，超出上限时淘汰最早的已结束任务"""
+    with conversion_lock:
+        conversion_results[task_id] = progress_manager
+        if len(conversion_results) <= MAX_CONVERSION_TASKS:
+            return
+        overflow = len(conversion_results) - MAX_CONVERSION_TASKS
+        evicted = [tid for tid, progress in conversion_results.items()
+                   if not progress.is_running][:overflow]
+        for tid in evicted:
+            progress = conversion_results.pop(tid)
+            remove_result_file(progress.file_path)
+
+def remove_task(task_id):
+    """移除任务记录"""
+    with conversion_lock:
+        conversion_results.pop(task_id, None)
+
+def remove_result_file(file_path):
+    """删除任务的结果文件"""
+    if file_path:
+        try:
+            Path(file_path).unlink(missing_ok=True)
+        except Exception:
+            pass
+
 def convert_image_thread(task_id, image_bytes, ext, width, height, selected_blocks, format_type, filename):
-    """在单独线程中执行图片转换"""
+    """在线程池中执行图片转换"""
+    global active_conversions
     progress_manager = conversion_results[task_id]
     converter = WebImageToStructure(progress_manager, CONFIG)
-    success = converter.convert(image_bytes, ext, width, height, selected_blocks, format_type, filename)
+    
+    with active_conversions_lock:
+        active_conversions += 1
+        running = active_conversions
+    try:
+        if NUMBA_AVAILABLE:
+            # set_num_threads 只作用于当前线程，每个任务按开始时的并发数分得一份线程
+            set_num_threads(max(1, numba.config.NUMBA_NUM_THREADS // running))
+        success = converter.convert(image_bytes, ext, width, height, selected_blocks, format_type, filename)
+    finally:
+        with active_conversions_lock:
+            active_conversions -= 1
     
     if not success:
         progress_manager.log("❌ 转换失败")
@@ -602,16 +803,22 @@ def get_blocks():
 @app.route('/api/progress/<task_id>')
 def get_progress(task_id):
     """获取转换进度"""
-    if task_id not in conversion_results:
+    progress = conversion_results.get(task_id)
+    if progress is None:
         return jsonify({'error': '任务不存在'}), 404
+    # 客户端通过 since 传入已收到的日志条数，只返回新增部分；未传入时返回最近20条
+    logs = progress.logs
+    log_count = len(logs)
+    since = request.args.get('since', type=int)
+    new_logs = logs[since:log_count] if since is not None else logs[-20:]
     
-    progress = conversion_results[task_id]
     return jsonify({
         'progress': progress.progress,
         'message': progress.message,
         'stage': progress.current_stage,
         'is_running': progress.is_running,
-        'logs': progress.logs[-20:],  # 返回最近20条日志
+        'logs': new_logs,
+        'next_log': log_count,
         'filename': progress.filename,
     })
 
@@ -654,15 +861,15 @@ def convert_image():
         
         # 创建进度管理器
         progress_manager = ConversionProgress(task_id)
-        conversion_results[task_id] = progress_manager
-        
-        # 在单独线程中执行转换
-        thread = threading.Thread(
-            target=convert_image_thread,
-            args=(task_id, image_bytes, ext, width, height, selected_blocks, format_type, filename_base)
+        # 排队期间也视为运行中，避免被容量淘汰
+        progress_manager.is_running = True
+        register_task(task_id, progress_manager)
+        
+        # 提交到线程池执行转换
+        conversion_executor.submit(
+            convert_image_thread,
+            task_id, image_bytes, ext, width, height, selected_blocks, format_type, filename_base
         )
-        thread.daemon = True
-        thread.start()
         
         return jsonify({
             'success': True,
@@ -678,11 +885,10 @@ def convert_image():
 @app.route('/api/download/<task_id>')
 def download_file(task_id):
     """下载转换结果文件"""
-    if task_id not in conversion_results:
+    progress = conversion_results.get(task_id)
+    if progress is None:
         return jsonify({'error': '文件不存在'}), 404
     
-    progress = conversion_results[task_id]
-    
     if not progress.file_path or not Path(progress.file_path).exists():
         return jsonify({'error': '文件未就绪或已过期'}), 404
     
@@ -694,8 +900,7 @@ def download_file(task_id):
             try:
                 if Path(progress.file_path).exists():
                     Path(progress.file_path).unlink()
-                if task_id in conversion_results:
-                    del conversion_results[task_id]
+                remove_task(task_id)
             except Exception as e:
                 logger.error(f"清理文件失败: {e}")
             
@@ -730,8 +935,7 @@ def download_file(task_id):
             try:
                 if file_path.exists():
                     file_path.unlink()
-                if task_id in conversion_results:
-                    del conversion_results[task_id]
+                remove_task(task_id)
             except Exception as e:
                 logger.error(f"清理文件失败: {e}")
         
@@ -750,21 +954,14 @@ def cleanup_temp_files():
     current_time = time.time()
     
     # 清理转换结果
-    expired_tasks = []
-    for task_id, progress in conversion_results.items():
-        if not progress.is_running and current_time - progress.create_time > 3600:
-            expired_tasks.append(task_id)
-            
-            # 清理文件
-            if progress.file_path and Path(progress.file_path).exists():
-                try:
-                    Path(progress.file_path).unlink()
-                except Exception:
-                    pass
+    with conversion_lock:
+        expired_tasks = [task_id for task_id, progress in conversion_results.items()
+                         if not progress.is_running and current_time - progress.create_time > 3600]
+        expired = [conversion_results.pop(task_id) for task_id in expired_tasks]
     
-    for task_id in expired_tasks:
-        if task_id in conversion_results:
-            del conversion_results[task_id]
+    # 清理文件
+    for progress in expired:
+        remove_result_file(progress.file_path)
     
     # 清理临时目录中的旧文件
     if TEMP_DIR.exists():
@@ -777,6 +974,15 @@ def cleanup_temp_files():
                     except Exception:
                         pass
 
+def cleanup_loop():
+    """后台定期清理过期任务和临时文件"""
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        try:
+            cleanup_temp_files()
+        except Exception as e:
+            logger.error(f"清理过期任务失败: {e}")
+
 if __name__ == '__main__':
     # 确保block目录存在
     block_dir = Path("block")
@@ -784,6 +990,8 @@ if __name__ == '__main__':
         create_default_block_files()
         print("✅ 已创建默认方块映射文件")
     
+    threading.Thread(target=cleanup_loop, daemon=True).start()
+    
     print("🚀 SunPixel Web服务器启动中...")
     print(f"📝 版本: {CONFIG['version']}")
     print(f"🌐 访问 http://127.0.0.1:{CONFIG['web_server']['port']} 使用Web界面")
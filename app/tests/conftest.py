@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 测试按 app 目录下的模块名导入 (SunPixel、Format.*)，与直接运行程序时一致
+APP_DIR = Path(__file__).resolve().parent.parent
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
@@ -0,0 +1,111 @@
+"""schem 的 varint 方块数据和 Litematica BlockStates 打包的测试"""
+import importlib
+import os
+
+import numpy as np
+import pytest
+
+from conftest import APP_DIR
+from Format._common import encode_varints, pack_block_states
+
+
+@pytest.fixture(scope="module")
+def sunpixel():
+    # SunPixel 导入时会在当前目录创建 Format 目录，需在 app 目录下导入
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)
+    try:
+        return importlib.import_module("SunPixel")
+    finally:
+        os.chdir(cwd)
+
+
+def reference_varints(values):
+    """逐个值编码的参考实现"""
+    out = bytearray()
+    for value in values:
+        value = int(value)
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+            if value:
+                out.append(byte | 0x80)
+            else:
+                out.append(byte)
+                break
+    return np.frombuffer(bytes(out), dtype=np.int8)
+
+
+def reference_block_states(indices, bits_per_entry):
+    """原先逐条目移位打包的实现，条目可跨越相邻的 Long"""
+    mask = (1 << bits_per_entry) - 1
+    states = []
+    buffer = 0
+    bits_in_buffer = 0
+    for index in indices:
+        buffer |= (int(index) & mask) << bits_in_buffer
+        bits_in_buffer += bits_per_entry
+        while bits_in_buffer >= 64:
+            long_value = buffer & ((1 << 64) - 1)
+            if long_value >= (1 << 63):
+                long_value -= (1 << 64)
+            states.append(long_value)
+            buffer >>= 64
+            bits_in_buffer -= 64
+    if bits_in_buffer > 0:
+        long_value = buffer & ((1 << 64) - 1)
+        if long_value >= (1 << 63):
+            long_value -= (1 << 64)
+        states.append(long_value)
+    return states
+
+
+@pytest.mark.parametrize("high", [1, 0x80, 0x4000, 0x200000, 0x10000000])
+def test_encode_varints_matches_reference(sunpixel, high):
+    values = np.random.default_rng(high).integers(0, high, size=(3, 17, 29))
+    expected = reference_varints(values.ravel())
+    for encode in (encode_varints, sunpixel.encode_varints):
+        encoded = encode(values)
+        assert encoded.dtype == np.int8
+        np.testing.assert_array_equal(encoded, expected)
+
+
+def test_encode_varints_boundaries():
+    values = np.array([0, 0x7F, 0x80, 0x3FFF, 0x4000, 0x1FFFFF, 0x200000])
+    np.testing.assert_array_equal(encode_varints(values), reference_varints(values))
+    assert encode_varints(np.zeros(0, dtype=np.int64)).size == 0
+
+
+@pytest.mark.parametrize("high", [0x80, 0x4000, 0x200000, 0x10000000])
+def test_decode_varints_round_trip(sunpixel, high):
+    values = np.random.default_rng(high).integers(0, high, size=500)
+    decoded = sunpixel.decode_varints(encode_varints(values))
+    np.testing.assert_array_equal(decoded, values)
+
+
+def test_decode_varints_empty(sunpixel):
+    assert sunpixel.decode_varints(np.zeros(0, dtype=np.int8)).size == 0
+
+
+def test_decode_varints_truncated(sunpixel):
+    encoded = encode_varints(np.array([1, 300, 70000]))
+    # 在最后一个 varint 中途截断，最后一个字节仍带有后续标志
+    assert sunpixel.decode_varints(encoded[:-1]) is None
+    assert sunpixel.decode_varints(encoded[:1]) is not None
+    assert sunpixel.decode_varints(np.array([-128], dtype=np.int8)) is None
+
+
+def test_decode_varints_too_long(sunpixel):
+    # 6 个字节的 varint 超出 32 位整数的范围
+    data = np.array([0x80] * 5 + [0x01], dtype=np.uint8).view(np.int8)
+    assert sunpixel.decode_varints(data) is None
+
+
+@pytest.mark.parametrize("bits_per_entry", [4, 5, 7, 12, 16])
+@pytest.mark.parametrize("count", [1, 13, 64, 300])
+def test_pack_block_states_matches_loop(bits_per_entry, count):
+    rng = np.random.default_rng(bits_per_entry * 1000 + count)
+    indices = rng.integers(0, 1 << bits_per_entry, size=count)
+    packed = pack_block_states(indices, bits_per_entry)
+    assert packed.dtype == np.dtype('<i8')
+    assert packed.tolist() == reference_block_states(indices, bits_per_entry)
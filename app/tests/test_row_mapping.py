@@ -0,0 +1,49 @@
+"""Numba 内核与 NumPy 回退路径的像素映射结果一致性测试"""
+import numpy as np
+import pytest
+
+from conftest import APP_DIR
+from Format import _common
+from Format.schem import schemConverter
+
+pytestmark = pytest.mark.skipif(not _common.NUMBA_AVAILABLE, reason="需要安装 Numba")
+
+
+class StubConfig:
+    """只提供转换器用到的 get/getboolean"""
+    def __init__(self, color_metric):
+        self.color_metric = color_metric
+
+    def get(self, section, key, fallback=None):
+        if (section, key) == ('conversion', 'color_metric'):
+            return self.color_metric
+        return fallback
+
+    def getboolean(self, section, key, fallback=False):
+        return False
+
+
+def map_rows(color_metric, pixels, width, height):
+    converter = schemConverter(StubConfig(color_metric))
+    assert converter.load_block_mappings(['wool', 'concrete', 'terracotta'])
+    converter.load_image(pixels)
+    converter.set_size(width, height)
+    return converter.map_pixels_to_rows()
+
+
+@pytest.mark.parametrize("color_metric", ['redmean', 'lab'])
+@pytest.mark.parametrize("width, height", [(40, 30), (97, 61), (200, 150)])
+def test_numba_matches_numpy(monkeypatch, color_metric, width, height):
+    monkeypatch.chdir(APP_DIR)
+    pixels = np.random.default_rng(width).integers(0, 256, size=(113, 157, 3), dtype=np.uint8)
+    
+    # 调色板和查找表按方块组合在类上缓存，两条路径各用一份新的缓存，避免共用已填好的查找表
+    monkeypatch.setattr(_common.BaseConverter, '_palette_cache', {})
+    numba_rows = map_rows(color_metric, pixels, width, height)
+    
+    monkeypatch.setattr(_common.BaseConverter, '_palette_cache', {})
+    monkeypatch.setattr(_common, 'NUMBA_AVAILABLE', False)
+    numpy_rows = map_rows(color_metric, pixels, width, height)
+    
+    assert numba_rows.shape == (height, width)
+    np.testing.assert_array_equal(numba_rows, numpy_rows)